@@ -0,0 +1,65 @@
+"""
+Compares the installed JSON codecs on a synthetic FindResultDataByJob payload.
+
+    python -m benchmarks.json_codecs [rows]
+"""
+import json
+import sys
+import timeit
+from typing import Any
+
+from duneapi import codec
+
+REPEAT = 5
+
+
+def result_payload(rows: int) -> dict[str, Any]:
+    """A response to FindResultDataByJob with `rows` rows of typical columns"""
+    return {
+        "data": {
+            "query_results": [
+                {
+                    "id": "3158cc2c-5ed1-4779-b523-eeb9c3b34b21",
+                    "job_id": "093e440d-66ce-4c00-81ec-2406f0403bc0",
+                    "runtime": 3,
+                    "generated_at": "2022-03-19T07:11:37.344998+00:00",
+                    "columns": ["hash", "block", "time", "value", "address"],
+                }
+            ],
+            "query_errors": [],
+            "get_result_by_job_id": [
+                {
+                    "data": {
+                        "hash": f"0x{i:064x}",
+                        "block": 14362177 + i,
+                        "time": "2022-03-10T23:50:16+00:00",
+                        "value": i * 0.14785533,
+                        "address": f"\\x{i:040x}",
+                    }
+                }
+                for i in range(rows)
+            ],
+        }
+    }
+
+
+def seconds(function: Any) -> float:
+    """Best of REPEAT runs of `function`"""
+    return min(timeit.repeat(function, number=1, repeat=REPEAT))
+
+
+def run(rows: int) -> None:
+    """Prints the decode and encode times (in seconds) of each codec"""
+    payload = result_payload(rows)
+    body = json.dumps(payload).encode("utf-8")
+    print(f"{rows} rows, {len(body) / 1e6:.1f} MB")
+    print(f"{'codec':<10}{'loads':>10}{'dumps':>10}")
+    for name in codec.CODECS:
+        codec.set_codec(name)
+        loads = seconds(lambda: codec.loads(body))
+        dumps = seconds(lambda: codec.dumps(payload))
+        print(f"{name:<10}{loads:>10.4f}{dumps:>10.4f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
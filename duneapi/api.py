@@ -5,21 +5,35 @@ at commit bdccd5ba543a8f3679e2c81e18cee846af47bc52
 """
 from __future__ import annotations
 
+import logging
 import os
-import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
 
 from deprecated.classic import deprecated
 from dotenv import load_dotenv
-from requests import Session, Response
+from requests import RequestException, Response, Session
 
+from . import codec
+from .auth import SessionStore, TokenManager, is_auth_failure
+from .cache import ResultCache
 from .logger import set_log
+from .polling import PollingStrategy, client_polling, poll_until
+from .singleflight import SingleFlight
+from .stream import ResultStream
+from .tracker import JobTracker
+from .transport import Timeout, TransportConfig
 from .response import (
+    DuneResponse,
+    pre_validate_response,
     validate_and_parse_dict_response,
     validate_and_parse_list_response,
 )
+from .util import seconds_since
 from .types import (
+    ColumnarResults,
     DuneRecord,
+    ListInnerResponse,
     QueryResults,
     DuneQuery,
     Post,
@@ -29,103 +43,217 @@ from .types import (
 
 log = set_log(__name__)
 
+T = TypeVar("T")
+
 BASE_URL = "https://dune.xyz"
 GRAPH_URL = "https://core-hsr.dune.xyz/v1/graphql"
+SESSION_HEADERS = {
+    "origin": BASE_URL,
+    "sec-ch-ua": "empty",
+    "sec-ch-ua-mobile": "?0",
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-site",
+    "dnt": "1",
+}
+JSON_HEADERS = {"content-type": "application/json"}
+# Bytes read at a time from streamed result downloads.
+STREAM_CHUNK_SIZE = 1 << 16
+# Rows per request of paginated result downloads, and attempts per page.
+PAGE_SIZE = 10_000
+PAGE_ATTEMPTS = 3
 
 
+# pylint: disable=too-many-instance-attributes,too-many-public-methods
 class DuneAPI:
     """
     Acts as API client for dune.xyz. All requests to be made through this class.
     """
 
+    # pylint: disable=too-many-arguments
     def __init__(
         self,
         username: str,
         password: str,
         max_retries: int = 2,
         ping_frequency: int = 5,
+        session_store: Optional[SessionStore] = None,
+        transport: Optional[TransportConfig] = None,
     ):
         """
         Initialize the object
         :param username: username for dune.xyz
         :param password: password for dune.xyz
+        :param session_store: optional store persisting the session across processes
+        :param transport: HTTP settings (use TransportConfig.for_workers when
+            sharing the client between threads)
         """
         self.csrf = None
         self.auth_refresh = None
-        self.token = None
+        self.token_manager = TokenManager()
         self.username = username
         self.password = password
-        self.session = Session()
+        self.transport = transport if transport is not None else TransportConfig()
+        self.session: Session = self.transport.build_session()
+        # Number of re-logins, so that concurrent failures cause only one (see relogin)
+        self.auth_generation = 0
         self.max_retries = max_retries
         self.ping_frequency = ping_frequency
-        headers = {
-            "origin": BASE_URL,
-            "sec-ch-ua": "empty",
-            "sec-ch-ua-mobile": "?0",
-            "sec-fetch-dest": "empty",
-            "sec-fetch-mode": "cors",
-            "sec-fetch-site": "same-site",
-            "dnt": "1",
-        }
-        self.session.headers.update(headers)
+        # Polls start fast and back off to at most `ping_frequency` seconds.
+        # Assign any other PollingStrategy (e.g. FixedPolling) to customize.
+        self.polling: PollingStrategy = client_polling(ping_frequency)
+        # Runtime (in seconds) last observed per query_id, seeds the polling schedule.
+        self.runtimes: dict[int, float] = {}
+        self.session_store = session_store
+        # Assign a ResultCache to let fetch reuse recent results of identical queries.
+        self.result_cache: Optional[ResultCache] = None
+        # Identical executions (by DuneQuery.result_key) in flight at once are shared.
+        self._inflight: SingleFlight[list[DuneRecord]] = SingleFlight()
+        self.session.headers.update(SESSION_HEADERS)
+
+    @property
+    def token(self) -> Optional[str]:
+        """The currently cached bearer token"""
+        return self.token_manager.token
 
     @staticmethod
     def new_from_environment() -> DuneAPI:
-        """Initialize & authenticate a Dune client from the current environment"""
+        """
+        Initialize & authenticate a Dune client from the current environment.
+        When DUNE_SESSION_FILE is set, a previously stored session is reused
+        instead of logging in again. When DUNE_CACHE_DIR is set,
+        fetched results are cached there.
+        """
         load_dotenv()
+        session_file = os.environ.get("DUNE_SESSION_FILE")
         dune = DuneAPI(
             os.environ["DUNE_USER"],
             os.environ["DUNE_PASSWORD"],
+            session_store=SessionStore(session_file) if session_file else None,
         )
+        cache_dir = os.environ.get("DUNE_CACHE_DIR")
+        if cache_dir:
+            dune.result_cache = ResultCache(cache_dir)
         # loging and fetch_auth token don't really need to be here
-        dune.login()
+        if not dune.restore_session():
+            dune.login()
         return dune
 
+    def restore_session(self) -> bool:
+        """
+        Loads cookies and token from the session store (if any).
+        The restored session is only validated when it is first used:
+        should it be rejected, refresh_auth_token falls back to a full login.
+        :return: True if a stored session was restored
+        """
+        if self.session_store is None:
+            return False
+        stored = self.session_store.load(self.username)
+        if stored is None:
+            return False
+        for cookie in stored["cookies"]:
+            self.session.cookies.set(**cookie)
+        self.csrf = self.session.cookies.get("csrf")
+        self.auth_refresh = self.session.cookies.get("auth-refresh")
+        if stored["token"] is not None:
+            self.token_manager.set(stored["token"])
+        log.debug("Restored stored Dune session")
+        return True
+
+    def save_session(self) -> None:
+        """Persists the current session to the session store (if any)"""
+        if self.session_store is not None:
+            self.session_store.save(self.username, self.session, self.token)
+
     def login(self) -> None:
         """Attempt to log in to dune.xyz & get the token"""
         login_url = BASE_URL + "/auth/login"
         csrf_url = BASE_URL + "/api/auth/csrf"
         auth_url = BASE_URL + "/api/auth"
 
-        # fetch login page
-        self.session.get(login_url)
+        timeout = self.transport.poll_timeout
+        with self.token_manager.lock:
+            # fetch login page
+            self.session.get(login_url, timeout=timeout)
 
-        # get csrf token
-        self.session.post(csrf_url)
-        self.csrf = self.session.cookies.get("csrf")
+            # get csrf token
+            self.session.post(csrf_url, timeout=timeout)
+            self.csrf = self.session.cookies.get("csrf")
 
-        # try to log in
-        form_data = {
-            "action": "login",
-            "username": self.username,
-            "password": self.password,
-            "csrf": self.csrf,
-            "next": BASE_URL,
-        }
+            # try to log in
+            form_data = {
+                "action": "login",
+                "username": self.username,
+                "password": self.password,
+                "csrf": self.csrf,
+                "next": BASE_URL,
+            }
 
-        self.session.post(auth_url, data=form_data)
-        self.auth_refresh = self.session.cookies.get("auth-refresh")
+            self.session.post(auth_url, data=form_data, timeout=timeout)
+            self.auth_refresh = self.session.cookies.get("auth-refresh")
+            # Any token cached from a previous session is no longer trusted.
+            self.token_manager.invalidate()
+
+    def relogin(self, generation: int) -> None:
+        """
+        Logs in again and refreshes the token, unless another thread
+        has done so since `generation` (read from `auth_generation` before
+        the failure which prompted the re-login) in which case that login is reused.
+        """
+        with self.token_manager.lock:
+            if self.auth_generation != generation:
+                return
+            self.login()
+            self.refresh_auth_token()
+            self.auth_generation += 1
 
     def fetch_auth_token(self) -> None:
         """Fetch authorization token for the user"""
         session_url = BASE_URL + "/api/auth/session"
 
-        response = self.session.post(session_url)
-        if response.status_code == 200:
-            self.token = response.json().get("token")
-        else:
+        response = self.session.post(session_url, timeout=self.transport.poll_timeout)
+        token = response.json().get("token") if response.status_code == 200 else None
+        if not token:
             raise RuntimeError("Failed to fetch auth token", response.text)
+        self.token_manager.set(token)
 
     def refresh_auth_token(self) -> None:
         """Set authorization token for the user"""
-        self.fetch_auth_token()
-        self.session.headers.update({"authorization": f"Bearer {self.token}"})
+        with self.token_manager.lock:
+            try:
+                self.fetch_auth_token()
+            except RuntimeError:
+                if self.session_store is None:
+                    raise
+                # The restored session may have expired; start a fresh one.
+                log.info("Stored session rejected, logging in again")
+                self.login()
+                self.fetch_auth_token()
+            self.save_session()
+
+    def _valid_token(self) -> Optional[str]:
+        """The current token, first refreshed if it is about to expire"""
+        if self.token_manager.needs_refresh():
+            with self.token_manager.lock:
+                # Threads that waited for the lock use the token refreshed meanwhile.
+                if self.token_manager.needs_refresh():
+                    self.refresh_auth_token()
+        return self.token
 
-    def initiate_query(self, query: DuneQuery) -> bool:
+    def _renew_token(self, rejected: Optional[str]) -> Optional[str]:
+        """Replaces the `rejected` token, unless another thread already has"""
+        with self.token_manager.lock:
+            if self.token == rejected:
+                self.token_manager.invalidate()
+                self.refresh_auth_token()
+        return self.token
+
+    def initiate_query(self, query: DuneQuery, minimal: bool = False) -> bool:
         """
         Initiates a new query.
+        :param minimal: skip sending the upserted query document back in the response
         """
-        post_data = query.upsert_query_post()
+        post_data = query.upsert_query_post(minimal)
         response = self.post_dune_request(post_data)
         validate_and_parse_dict_response(response, post_data.key_map)
         # Return True to indicate method was success.
@@ -139,8 +267,8 @@ class DuneAPI:
         """Executes query at query_id"""
         post_data = execute_query_post_data(query.query_id, query.parameters)
         response = self.post_dune_request(post_data)
-        validate_and_parse_dict_response(response, post_data.key_map)
-        return str(response.json()["data"]["execute_query"]["job_id"])
+        response_data = validate_and_parse_dict_response(response, post_data.key_map)
+        return str(response_data["execute_query"]["job_id"])
 
     def execute(
         self, query_id: int, parameters: Optional[list[QueryParameter]] = None
@@ -150,65 +278,335 @@ class DuneAPI:
             parameters = []
         post_data = execute_query_post_data(query_id, parameters)
         response = self.post_dune_request(post_data)
-        validate_and_parse_dict_response(response, post_data.key_map)
-        return str(response.json()["data"]["execute_query"]["job_id"])
+        response_data = validate_and_parse_dict_response(response, post_data.key_map)
+        return str(response_data["execute_query"]["job_id"])
 
-    def get_results(self, job_id: str) -> list[DuneRecord]:
-        """Fetch the result for a query by id"""
+    def wait_for_job(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        expected_runtime: Optional[float] = None,
+    ) -> None:
+        """
+        Polls the queue position of `job_id` (according to `self.polling`)
+        until the job has completed.
+        :param timeout: seconds after which to give up with a TimeoutError
+        :param expected_runtime: previously observed runtime, seeds the poll schedule
+        """
         queue_position_post = DuneQuery.get_queue_position(job_id)
 
-        queue_position = self.post_dune_request(queue_position_post)
-        while queue_position.json()["data"]["jobs_by_pk"] is not None:
-            log.debug("Waiting for queue to end...")
-            time.sleep(self.ping_frequency)
+        def completed() -> bool:
             queue_position = self.post_dune_request(queue_position_post)
+            if queue_position.data["jobs_by_pk"] is None:
+                return True
+            log.debug("Waiting for queue to end...")
+            return False
+
+        poll_until(
+            completed,
+            self.polling.intervals(expected_runtime),
+            timeout,
+            description=f"Job {job_id}",
+        )
 
+    def _find_result_data(self, job_id: str) -> ListInnerResponse:
         find_result_post = DuneQuery.find_result_by_job(job_id)
         response = self.post_dune_request(find_result_post)
-        parsed_response = validate_and_parse_list_response(
-            response, find_result_post.key_map
+        return validate_and_parse_list_response(response, find_result_post.key_map)
+
+    def fetch_query_results(self, job_id: str) -> QueryResults:
+        """Fetch the results (with metadata) of the completed job `job_id`"""
+        return QueryResults(self._find_result_data(job_id))
+
+    def get_columnar_results(
+        self, job_id: str, timeout: Optional[float] = None
+    ) -> ColumnarResults:
+        """
+        Fetch the result for a query by id, stored column by column
+        (which takes a fraction of the memory of get_results for large results)
+        """
+        self.wait_for_job(job_id, timeout)
+        return ColumnarResults.from_response(self._find_result_data(job_id))
+
+    def get_results(
+        self, job_id: str, timeout: Optional[float] = None
+    ) -> list[DuneRecord]:
+        """Fetch the result for a query by id"""
+        self.wait_for_job(job_id, timeout)
+        return self.fetch_query_results(job_id).data
+
+    def _with_retries(self, description: str, request: Callable[[], T]) -> T:
+        """Performs `request`, making up to PAGE_ATTEMPTS attempts"""
+        attempt = 1
+        while True:
+            try:
+                return request()
+            except (RuntimeError, RequestException) as err:
+                if attempt >= PAGE_ATTEMPTS:
+                    raise
+                log.warning(f"{description} failed with {err}, retrying")
+                attempt += 1
+
+    def _fetch_result_page(
+        self, job_id: str, page_size: int, offset: int
+    ) -> list[dict[str, Any]]:
+        page_post = DuneQuery.find_result_page(job_id, page_size, offset)
+
+        def request() -> list[dict[str, Any]]:
+            response = self.post_dune_request(page_post)
+            data = validate_and_parse_list_response(response, page_post.key_map)
+            page: list[dict[str, Any]] = data["get_result_by_job_id"]
+            return page
+
+        return self._with_retries(f"Result page at {offset}", request)
+
+    def fetch_query_results_paginated(
+        self, job_id: str, page_size: int = PAGE_SIZE, max_workers: int = 4
+    ) -> QueryResults:
+        """
+        Fetch the results (with metadata) of the completed job `job_id`
+        in pages of `page_size` rows, of which up to `max_workers` are
+        fetched concurrently. Failed pages are retried individually.
+        """
+        first_post = DuneQuery.find_result_by_job(job_id, limit=page_size)
+
+        def request() -> ListInnerResponse:
+            response = self.post_dune_request(first_post)
+            return validate_and_parse_list_response(response, first_post.key_map)
+
+        data = self._with_retries("Result page at 0", request)
+        rows = data["get_result_by_job_id"]
+        if len(rows) < page_size:
+            return QueryResults(data)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            offsets = range(page_size, (max_workers + 1) * page_size, page_size)
+            # Fetch pages a batch at a time, until a page comes back short.
+            while True:
+                pages = [
+                    executor.submit(self._fetch_result_page, job_id, page_size, offset)
+                    for offset in offsets
+                ]
+                for future in pages:
+                    page = future.result()
+                    rows.extend(page)
+                    if len(page) < page_size:
+                        return QueryResults(data)
+                offsets = range(
+                    offsets.stop, offsets.stop + max_workers * page_size, page_size
+                )
+
+    def get_results_paginated(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        page_size: int = PAGE_SIZE,
+        max_workers: int = 4,
+    ) -> list[DuneRecord]:
+        """Fetch the result for a query by id, in concurrently fetched pages"""
+        self.wait_for_job(job_id, timeout)
+        return self.fetch_query_results_paginated(job_id, page_size, max_workers).data
+
+    def stream_results(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> ResultStream:
+        """
+        Fetch the result for a query by id, as an iterator over its rows
+        which are parsed while the response is downloaded (in chunks of `chunk_size`),
+        so that results need never be held in memory at once.
+        Use `batched` (from duneapi.stream) to process the rows in batches.
+        """
+        self.wait_for_job(job_id, timeout)
+        find_result_post = DuneQuery.find_result_by_job(job_id)
+        response = self.post_dune_request(find_result_post, stream=True)
+        if response.status_code != 200:
+            response.response.close()
+            raise RuntimeError("Dune post failed with", response)
+        return ResultStream(
+            response.response.iter_content(chunk_size), response.response.close
         )
-        return QueryResults(parsed_response).data
 
-    def post_dune_request(self, post: Post) -> Response:
+    def _post(
+        self, body: bytes, token: Optional[str], stream: bool, timeout: Timeout
+    ) -> Response:
+        # Authorized per request, since the session is shared by all threads.
+        headers = {**JSON_HEADERS, "authorization": f"Bearer {token}"}
+        return self.session.post(
+            GRAPH_URL, data=body, headers=headers, stream=stream, timeout=timeout
+        )
+
+    def post_dune_request(self, post: Post, stream: bool = False) -> DuneResponse:
         """
-        Refresh Authorization Token and posts query.
-        Parses response for errors by key and raises runtime error if they exist.
-        Only successful responses are returned
+        Posts query, refreshing the Authorization Token only when it is
+        about to expire or has been rejected (in which case the post is retried once).
         :param post: JSON content and validation parameters for request
-        :return: response in json format
+        :param stream: defer downloading the response body until it is read
+        :return: response, whose json body is decoded once (on first use)
         """
-        self.refresh_auth_token()
-        log.debug(f"Posting Dune Request {post.data}")
-        response = self.session.post(GRAPH_URL, json=post.data)
-        log.debug(f"Received Response {response.json()}")
+        token = self._valid_token()
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug:
+            log.debug(f"Posting Dune Request {post.data}")
+        body = codec.dumps(post.data)
+        timeout = self.transport.timeout(post)
+        response = self._post(body, token, stream, timeout)
+        if is_auth_failure(response, check_body=not stream):
+            log.debug("Authorization token rejected, refreshing and retrying")
+            if stream:
+                # Releases the connection of the unread response
+                response.close()
+            token = self._renew_token(token)
+            response = self._post(body, token, stream, timeout)
+        dune_response = DuneResponse(response)
+        if debug and not stream:
+            log.debug(f"Received Response {dune_response.text}")
 
-        return response
+        return dune_response
 
-    def execute_and_await_results(self, query: DuneQuery) -> list[DuneRecord]:
+    def find_recent_job(self, query: DuneQuery, max_age: float) -> Optional[str]:
+        """
+        Looks up the latest successful execution of `query` (with its parameters)
+        on Dune. Results are only used if the query saved on Dune has the SQL
+        and network of `query`, and was last saved before they were generated.
+        :return: its job id if the results were generated within `max_age` seconds
+        """
+        latest_post = query.find_latest_result()
+        latest_data = pre_validate_response(
+            self.post_dune_request(latest_post), latest_post.key_map
+        )
+        latest, saved = latest_data["get_result_v2"], latest_data["queries"]
+        if not latest or latest["result_id"] is None or latest["error_id"] is not None:
+            return None
+        if (
+            len(saved) != 1
+            or saved[0]["query"] != query.raw_sql
+            or saved[0]["dataset_id"] != query.network.value
+        ):
+            log.debug(f"{query.name} differs from the query saved on Dune")
+            return None
+        job_id = str(latest["job_id"])
+        # A page of no rows fetches the result metadata only.
+        meta_post = DuneQuery.find_result_by_job(job_id, limit=0)
+        meta = validate_and_parse_list_response(
+            self.post_dune_request(meta_post), meta_post.key_map
+        )["query_results"]
+        if len(meta) != 1:
+            return None
+        age = seconds_since(str(meta[0]["generated_at"]))
+        if age > seconds_since(str(saved[0]["updated_at"])):
+            log.debug(f"Latest results of {query.name} precede its last update")
+            return None
+        if age > max_age:
+            log.debug(f"Latest results of {query.name} are {age:.0f} seconds old")
+            return None
+        return job_id
+
+    def _fetch_recent(
+        self, query: DuneQuery, max_age: float
+    ) -> Optional[list[DuneRecord]]:
+        job_id = self.find_recent_job(query, max_age)
+        if job_id is None:
+            return None
+        log.info(f"Reusing results of job {job_id} for {query.name}")
+        return self.fetch_query_results(job_id).data
+
+    def execute_and_await_results(
+        self,
+        query: DuneQuery,
+        timeout: Optional[float] = None,
+        max_age: Optional[float] = None,
+    ) -> list[DuneRecord]:
         """
         Executes query by ID and awaits completion.
+        Concurrent calls (from several threads) for an identical query and `max_age`
+        share one execution and get the very same records (so mutate with care).
+        A call joining another one shares its outcome, including a TimeoutError
+        raised after the `timeout` of the call it joined.
+        :param timeout: seconds after which to stop awaiting with a TimeoutError
+        :param max_age: reuse existing results generated within this many seconds
+            (instead of executing the query again)
         :return: parsed list of dict records returned from query
         """
+        # Calls asking for fresh results must not share reused ones.
+        key = f"{query.result_key()}:{max_age}"
+        return self._inflight.call(
+            key, lambda: self._execute_and_await(query, timeout, max_age)
+        )
+
+    def _execute_and_await(
+        self, query: DuneQuery, timeout: Optional[float], max_age: Optional[float]
+    ) -> list[DuneRecord]:
+        if max_age is not None:
+            recent = self._fetch_recent(query, max_age)
+            if recent is not None:
+                return recent
         job_id = self.execute(query.query_id, query.parameters)
-        data_set = self.get_results(job_id)
+        self.wait_for_job(
+            job_id, timeout, expected_runtime=self.runtimes.get(query.query_id)
+        )
+        results = self.fetch_query_results(job_id)
+        if results.meta is not None:
+            self.runtimes[query.query_id] = results.meta.runtime
+        data_set = results.data
         log.info(f"got {len(data_set)} records from last query")
         return data_set
 
-    def fetch(self, query: DuneQuery) -> list[DuneRecord]:
+    def execute_and_await_all(
+        self, queries: list[DuneQuery], timeout: Optional[float] = None
+    ) -> list[list[DuneRecord]]:
+        """
+        Executes all `queries` and awaits their completion together,
+        polling the status of all outstanding jobs with a single request per tick.
+        :return: parsed list of dict records for each query (in order)
+        """
+        tracker = JobTracker(self)
+        futures = [
+            tracker.track(self.execute(q.query_id, q.parameters)) for q in queries
+        ]
+        tracker.wait(timeout)
+        return [future.result() for future in futures]
+
+    def fetch(
+        self,
+        query: DuneQuery,
+        timeout: Optional[float] = None,
+        force_refresh: bool = False,
+        max_age: Optional[float] = None,
+    ) -> list[DuneRecord]:
         """
         Pushes new query, executes and awaiting query completion
+        :param timeout: seconds to await each execution before raising TimeoutError
+        :param force_refresh: execute the query even if `result_cache` holds results
+        :param max_age: reuse the latest results on Dune if generated within this many
+            seconds, skipping upsert and execution (see find_recent_job)
         :return: list query records as dictionaries
         """
+        if self.result_cache is not None and not force_refresh:
+            cached = self.result_cache.get(query)
+            if cached is not None:
+                log.info(f"Using cached results of {query.name}")
+                return cached
+        results = self._fetch_recent(query, max_age) if max_age is not None else None
+        if results is None:
+            results = self._execute_with_retries(query, timeout)
+        if self.result_cache is not None:
+            self.result_cache.put(query, results)
+        return results
+
+    def _execute_with_retries(
+        self, query: DuneQuery, timeout: Optional[float]
+    ) -> list[DuneRecord]:
         log.info(f"Fetching {query.name} on {query.network}...")
         self.initiate_query(query)
         for _ in range(0, self.max_retries):
+            generation = self.auth_generation
             try:
-                return self.execute_and_await_results(query)
+                return self.execute_and_await_results(query, timeout)
             except RuntimeError as err:
                 log.warning(
                     f"failed with {err}. Re-establishing connection and trying again"
                 )
-                self.login()
-                self.refresh_auth_token()
+                self.relogin(generation)
         raise Exception(f"Maximum retries ({self.max_retries}) exceeded")
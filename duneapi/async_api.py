@@ -0,0 +1,310 @@
+"""
+Asynchronous counterpart of DuneAPI, so that many executions
+can be awaited concurrently on a single event loop.
+"""
+# Mirrors the synchronous client method by method.
+# pylint: disable-msg=R0801
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from requests import Response, Session
+
+from . import codec
+from .api import BASE_URL, GRAPH_URL, JSON_HEADERS, SESSION_HEADERS
+from .auth import TokenManager, is_auth_failure
+from .logger import set_log
+from .polling import PollingStrategy, client_polling, async_poll_until
+from .singleflight import AsyncSingleFlight
+from .transport import TransportConfig
+from .response import (
+    DuneResponse,
+    validate_and_parse_dict_response,
+    validate_and_parse_list_response,
+)
+from .types import (
+    DuneQuery,
+    DuneRecord,
+    Post,
+    QueryParameter,
+    QueryResults,
+    execute_query_post_data,
+)
+
+log = set_log(__name__)
+
+
+# pylint: disable=too-few-public-methods
+class AsyncTransport(ABC):
+    """Performs the HTTP requests of AsyncDuneAPI"""
+
+    def __init__(
+        self,
+        session: Optional[Session] = None,
+        config: Optional[TransportConfig] = None,
+    ):
+        """
+        :param session: session holding the cookies and headers of the client
+            (and performing the requests), built from `config` if None
+        :param config: HTTP settings, whose pool sizes bound the concurrent requests
+        """
+        self.config = config if config is not None else TransportConfig()
+        self.session = session if session is not None else self.config.build_session()
+
+    @abstractmethod
+    async def request(self, method: str, url: str, **kwargs: Any) -> Response:
+        """Sends request with `method` to `url`, kwargs as for requests.request"""
+
+
+class ThreadedTransport(AsyncTransport):
+    """
+    Default transport: performs the requests of a `requests.Session`
+    in worker threads, so that the event loop is never blocked.
+    """
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> Response:
+        return await asyncio.to_thread(self.session.request, method, url, **kwargs)
+
+
+# pylint: disable=too-many-instance-attributes
+class AsyncDuneAPI:
+    """
+    Acts as asynchronous API client for dune.xyz,
+    with the same methods as DuneAPI available as coroutines.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        max_retries: int = 2,
+        ping_frequency: int = 5,
+        transport: Optional[AsyncTransport] = None,
+    ):
+        """
+        Initialize the object
+        :param username: username for dune.xyz
+        :param password: password for dune.xyz
+        :param transport: performs the HTTP requests, defaults to ThreadedTransport
+        """
+        self.csrf = None
+        self.auth_refresh = None
+        self.token_manager = TokenManager()
+        self.username = username
+        self.password = password
+        self.transport = transport if transport is not None else ThreadedTransport()
+        self.transport.session.headers.update(SESSION_HEADERS)
+        self.max_retries = max_retries
+        self.polling: PollingStrategy = client_polling(ping_frequency)
+        self.runtimes: dict[int, float] = {}
+        # Number of re-logins, so that concurrent failures cause only one (see relogin)
+        self.auth_generation = 0
+        # Created lazily, so it binds to the loop the client is used on.
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._inflight: AsyncSingleFlight[list[DuneRecord]] = AsyncSingleFlight()
+
+    @property
+    def session(self) -> Session:
+        """The session holding cookies and headers of this client"""
+        return self.transport.session
+
+    @property
+    def token(self) -> Optional[str]:
+        """The currently cached bearer token"""
+        return self.token_manager.token
+
+    async def login(self) -> None:
+        """Attempt to log in to dune.xyz & get the token"""
+        timeout = self.transport.config.poll_timeout
+        await self.transport.request("GET", BASE_URL + "/auth/login", timeout=timeout)
+        await self.transport.request(
+            "POST", BASE_URL + "/api/auth/csrf", timeout=timeout
+        )
+        self.csrf = self.session.cookies.get("csrf")
+        form_data = {
+            "action": "login",
+            "username": self.username,
+            "password": self.password,
+            "csrf": self.csrf,
+            "next": BASE_URL,
+        }
+        await self.transport.request(
+            "POST", BASE_URL + "/api/auth", data=form_data, timeout=timeout
+        )
+        self.auth_refresh = self.session.cookies.get("auth-refresh")
+        self.token_manager.invalidate()
+
+    async def relogin(self, generation: int) -> None:
+        """
+        Logs in again and refreshes the token, unless another task
+        has done so since `generation` (read from `auth_generation` before
+        the failure which prompted the re-login) in which case that login is reused.
+        """
+        async with self._auth_lock:
+            if self.auth_generation != generation:
+                return
+            await self.login()
+            await self.refresh_auth_token()
+            self.auth_generation += 1
+
+    async def refresh_auth_token(self) -> None:
+        """Fetch authorization token for the user"""
+        response = await self.transport.request(
+            "POST",
+            BASE_URL + "/api/auth/session",
+            timeout=self.transport.config.poll_timeout,
+        )
+        token = response.json().get("token") if response.status_code == 200 else None
+        if not token:
+            raise RuntimeError("Failed to fetch auth token", response.text)
+        self.token_manager.set(token)
+
+    @property
+    def _auth_lock(self) -> asyncio.Lock:
+        """Held while the token is being replaced"""
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        return self._token_lock
+
+    async def _valid_token(self) -> Optional[str]:
+        """The current token, first refreshed if it is about to expire"""
+        if self.token_manager.needs_refresh():
+            async with self._auth_lock:
+                # Concurrent requests share the refresh of whoever got here first.
+                if self.token_manager.needs_refresh():
+                    await self.refresh_auth_token()
+        return self.token
+
+    async def _renew_token(self, rejected: Optional[str]) -> Optional[str]:
+        """Replaces the `rejected` token, unless another task already has"""
+        async with self._auth_lock:
+            if self.token == rejected:
+                self.token_manager.invalidate()
+                await self.refresh_auth_token()
+        return self.token
+
+    async def _post(self, post: Post, token: Optional[str]) -> Response:
+        return await self.transport.request(
+            "POST",
+            GRAPH_URL,
+            data=codec.dumps(post.data),
+            headers={**JSON_HEADERS, "authorization": f"Bearer {token}"},
+            timeout=self.transport.config.timeout(post),
+        )
+
+    async def post_dune_request(self, post: Post) -> DuneResponse:
+        """
+        Posts query, refreshing the Authorization Token only when it is
+        about to expire or has been rejected (in which case the post is retried once).
+        """
+        token = await self._valid_token()
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f"Posting Dune Request {post.data}")
+        response = await self._post(post, token)
+        if is_auth_failure(response):
+            log.debug("Authorization token rejected, refreshing and retrying")
+            token = await self._renew_token(token)
+            response = await self._post(post, token)
+        return DuneResponse(response)
+
+    async def initiate_query(self, query: DuneQuery, minimal: bool = False) -> bool:
+        """Initiates a new query."""
+        post_data = query.upsert_query_post(minimal)
+        response = await self.post_dune_request(post_data)
+        validate_and_parse_dict_response(response, post_data.key_map)
+        return True
+
+    async def execute(
+        self, query_id: int, parameters: Optional[list[QueryParameter]] = None
+    ) -> str:
+        """Executes existing query at `query_id` with `parameters`"""
+        post_data = execute_query_post_data(query_id, parameters or [])
+        response = await self.post_dune_request(post_data)
+        response_data = validate_and_parse_dict_response(response, post_data.key_map)
+        return str(response_data["execute_query"]["job_id"])
+
+    async def wait_for_job(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        expected_runtime: Optional[float] = None,
+    ) -> None:
+        """Awaits completion of `job_id`, see DuneAPI.wait_for_job"""
+        queue_position_post = DuneQuery.get_queue_position(job_id)
+
+        async def completed() -> bool:
+            queue_position = await self.post_dune_request(queue_position_post)
+            return queue_position.data["jobs_by_pk"] is None
+
+        await async_poll_until(
+            completed,
+            self.polling.intervals(expected_runtime),
+            timeout,
+            description=f"Job {job_id}",
+        )
+
+    async def fetch_query_results(self, job_id: str) -> QueryResults:
+        """Fetch the results (with metadata) of the completed job `job_id`"""
+        find_result_post = DuneQuery.find_result_by_job(job_id)
+        response = await self.post_dune_request(find_result_post)
+        parsed_response = validate_and_parse_list_response(
+            response, find_result_post.key_map
+        )
+        return QueryResults(parsed_response)
+
+    async def get_results(
+        self, job_id: str, timeout: Optional[float] = None
+    ) -> list[DuneRecord]:
+        """Fetch the result for a query by id"""
+        await self.wait_for_job(job_id, timeout)
+        return (await self.fetch_query_results(job_id)).data
+
+    async def execute_and_await_results(
+        self, query: DuneQuery, timeout: Optional[float] = None
+    ) -> list[DuneRecord]:
+        """
+        Executes query by ID and awaits completion.
+        Concurrent calls for an identical query share one execution.
+        A call joining another one shares its outcome, including a TimeoutError
+        raised after the `timeout` of the call it joined.
+        :return: parsed list of dict records returned from query
+        """
+        return await self._inflight.call(
+            query.result_key(), lambda: self._execute_and_await(query, timeout)
+        )
+
+    async def _execute_and_await(
+        self, query: DuneQuery, timeout: Optional[float]
+    ) -> list[DuneRecord]:
+        job_id = await self.execute(query.query_id, query.parameters)
+        await self.wait_for_job(
+            job_id, timeout, expected_runtime=self.runtimes.get(query.query_id)
+        )
+        results = await self.fetch_query_results(job_id)
+        if results.meta is not None:
+            self.runtimes[query.query_id] = results.meta.runtime
+        log.info(f"got {len(results.data)} records from last query")
+        return results.data
+
+    async def fetch(
+        self, query: DuneQuery, timeout: Optional[float] = None
+    ) -> list[DuneRecord]:
+        """
+        Pushes new query, executes and awaiting query completion
+        :return: list query records as dictionaries
+        """
+        log.info(f"Fetching {query.name} on {query.network}...")
+        await self.initiate_query(query)
+        for _ in range(0, self.max_retries):
+            generation = self.auth_generation
+            try:
+                return await self.execute_and_await_results(query, timeout)
+            except RuntimeError as err:
+                log.warning(
+                    f"failed with {err}. Re-establishing connection and trying again"
+                )
+                await self.relogin(generation)
+        raise Exception(f"Maximum retries ({self.max_retries}) exceeded")
@@ -0,0 +1,184 @@
+"""Bearer token bookkeeping for the Dune API client"""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from requests import Response, Session
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore
+
+from .logger import set_log
+
+log = set_log(__name__)
+
+# Refresh this many seconds before the token's recorded expiry.
+REFRESH_MARGIN = 60
+
+
+class TokenManager:
+    """
+    Caches the bearer token together with its expiry, so that the token is only
+    refreshed when it is about to expire or has been rejected by the server.
+    """
+
+    def __init__(self, refresh_margin: float = REFRESH_MARGIN):
+        self.token: Optional[str] = None
+        self.expires_at: Optional[float] = None
+        self.refresh_margin = refresh_margin
+        # Held while the token (or the session it belongs to) is being replaced.
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def decode_expiry(token: str) -> Optional[float]:
+        """
+        Reads the `exp` claim (unix timestamp) from the payload of a JWT.
+        Returns None when the token is not a JWT or carries no expiry.
+        """
+        parts = token.split(".")
+        if len(parts) != 3:
+            return None
+        payload = parts[1]
+        # JWT segments are base64url encoded without padding
+        payload += "=" * (-len(payload) % 4)
+        try:
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+        except ValueError:
+            log.debug("Could not decode token payload")
+            return None
+        if not isinstance(claims, dict):
+            return None
+        expiry = claims.get("exp")
+        if isinstance(expiry, (int, float)):
+            return float(expiry)
+        return None
+
+    def set(self, token: str) -> None:
+        """Records a freshly fetched token and its expiry"""
+        expires_at = self.decode_expiry(token)
+        with self.lock:
+            self.token = token
+            self.expires_at = expires_at
+
+    def invalidate(self) -> None:
+        """Forgets the cached token (e.g. after it was rejected by the server)"""
+        with self.lock:
+            self.token = None
+            self.expires_at = None
+
+    def needs_refresh(self) -> bool:
+        """
+        True when there is no token, or it is within `refresh_margin` of expiry.
+        Tokens without known expiry are used until the server rejects them.
+        """
+        if self.token is None:
+            return True
+        if self.expires_at is None:
+            return False
+        return time.time() >= self.expires_at - self.refresh_margin
+
+
+def is_auth_failure(response: Response, check_body: bool = True) -> bool:
+    """
+    Detects responses rejected due to an expired or invalid bearer token.
+    The GraphQL endpoint reports these either by status code or
+    as an `invalid-jwt` error with status 200.
+    :param check_body: False for streamed responses, whose body must not be consumed
+    """
+    if response.status_code in (401, 403):
+        return True
+    if (
+        check_body
+        and response.status_code == 200
+        and response.content.startswith(b'{"errors"')
+    ):
+        return b"invalid-jwt" in response.content
+    return False
+
+
+class SessionStore:
+    """
+    File backed store for the cookies and bearer token of a logged-in session,
+    so that short-lived processes can skip the login handshake.
+    Access is guarded by an advisory lock file (where the platform supports it),
+    so several processes can share one store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @contextmanager
+    def _lock(self, exclusive: bool) -> Iterator[None]:
+        with open(self.path + ".lock", "a", encoding="utf-8") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, username: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the stored session of `username`, or None when there is
+        no (readable) session stored for this user.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with self._lock(exclusive=False):
+            try:
+                with open(self.path, "r", encoding="utf-8") as store_file:
+                    content: dict[str, Any] = json.load(store_file)
+            except (OSError, ValueError) as err:
+                log.warning(f"Ignoring unreadable session store {self.path}: {err}")
+                return None
+        if content.get("username") != username:
+            return None
+        return content
+
+    def save(self, username: str, session: Session, token: Optional[str]) -> None:
+        """Atomically persists the session cookies and token of `username`"""
+        content = {
+            "username": username,
+            "token": token,
+            "cookies": [
+                {
+                    "name": cookie.name,
+                    "value": cookie.value,
+                    "domain": cookie.domain,
+                    "path": cookie.path,
+                    "expires": cookie.expires,
+                    "secure": cookie.secure,
+                    # Non-standard attributes, such as HttpOnly (not in the stubs)
+                    "rest": getattr(cookie, "_rest", {}),
+                }
+                for cookie in session.cookies
+            ],
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock(exclusive=True):
+            # Session cookies are credentials: file is only readable by its owner.
+            handle, tmp_path = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(handle, "w", encoding="utf-8") as tmp_file:
+                    json.dump(content, tmp_file)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+    def clear(self) -> None:
+        """Removes the stored session"""
+        with self._lock(exclusive=True):
+            if os.path.exists(self.path):
+                os.remove(self.path)
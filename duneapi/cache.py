@@ -0,0 +1,124 @@
+"""
+On-disk cache of query results, keyed by DuneQuery.result_key,
+which can be shared by several processes.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+from . import codec
+from .logger import set_log
+from .types import DuneQuery, DuneRecord
+
+log = set_log(__name__)
+
+# Seconds for which cached results are used, unless configured per query.
+DEFAULT_TTL = 3600.0
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = ".json"
+
+
+class ResultCache:
+    """
+    Directory of query results, one file per result key. Entries are written
+    atomically (so concurrent readers only ever see complete entries) and expire
+    after a time to live. When the directory outgrows `max_bytes`, the least
+    recently used entries (by file modification time) are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Optional[dict[int, float]] = None,
+    ):
+        """
+        :param directory: where cache entries are stored (created if missing)
+        :param ttl: seconds for which cached results are used
+        :param max_bytes: total size of entries beyond which entries are evicted
+        :param ttls: time to live per query id, overriding `ttl`
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {}
+
+    def _path(self, query: DuneQuery) -> str:
+        return os.path.join(self.directory, query.result_key() + ENTRY_SUFFIX)
+
+    def ttl_for(self, query: DuneQuery) -> float:
+        """Time to live of the cached results of `query`"""
+        return self.ttls.get(query.query_id, self.ttl)
+
+    def get(self, query: DuneQuery) -> Optional[list[DuneRecord]]:
+        """Returns the cached results of `query` if present and not expired"""
+        path = self._path(query)
+        try:
+            with open(path, "rb") as entry_file:
+                entry: dict[str, Any] = codec.loads(entry_file.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as err:
+            log.warning(f"Ignoring unreadable cache entry {path}: {err}")
+            return None
+        if time.time() - entry["created"] > self.ttl_for(query):
+            return None
+        try:
+            # Marks the entry as recently used.
+            os.utime(path)
+        except OSError:
+            pass
+        records: list[DuneRecord] = entry["records"]
+        return records
+
+    def put(self, query: DuneQuery, records: list[DuneRecord]) -> None:
+        """Atomically stores `records` as the results of `query`"""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {
+            "query_id": query.query_id,
+            "created": time.time(),
+            "records": records,
+        }
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as tmp_file:
+                tmp_file.write(codec.dumps(entry))
+            os.replace(tmp_path, self._path(query))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the cache fits `max_bytes`"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """Removes all entries"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_SUFFIX):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,102 @@
+"""
+JSON encoding and decoding of request and response bodies, with the fastest
+JSON library installed (orjson, ujson or simdjson), falling back to the stdlib.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Callable, Optional, Union
+
+ObjectHook = Callable[[dict[str, Any]], Any]
+
+
+@dataclass(frozen=True)
+class Codec:
+    """A JSON library: encodes into bytes, decodes from str or bytes"""
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+def _import(name: str) -> Optional[ModuleType]:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def _utf8_encoded(to_str: Callable[[Any], str]) -> Callable[[Any], bytes]:
+    """Adapts the `dumps` of a library encoding into str to encode into bytes"""
+
+    def encoded(obj: Any) -> bytes:
+        return bytes(to_str(obj).encode("utf-8"))
+
+    return encoded
+
+
+def _available_codecs() -> dict[str, Codec]:
+    """Installed codecs, by name, in order of preference"""
+    codecs = {}
+    orjson = _import("orjson")
+    if orjson is not None:
+        codecs["orjson"] = Codec("orjson", orjson.dumps, orjson.loads)
+    ujson = _import("ujson")
+    if ujson is not None:
+        codecs["ujson"] = Codec("ujson", _utf8_encoded(ujson.dumps), ujson.loads)
+    simdjson = _import("simdjson")
+    if simdjson is not None:
+        codecs["simdjson"] = Codec("simdjson", STDLIB.dumps, simdjson.loads)
+    codecs["json"] = STDLIB
+    return codecs
+
+
+STDLIB = Codec(
+    "json",
+    lambda obj: json.dumps(obj, separators=(",", ":")).encode("utf-8"),
+    json.loads,
+)
+CODECS = _available_codecs()
+_selected = next(iter(CODECS.values()))  # pylint: disable=invalid-name
+
+
+def get_codec() -> Codec:
+    """The codec currently used to encode and decode JSON"""
+    return _selected
+
+
+def set_codec(name: str) -> None:
+    """Selects the (installed) codec `name` to encode and decode JSON"""
+    global _selected  # pylint: disable=global-statement,invalid-name
+    if name not in CODECS:
+        raise ValueError(f"JSON codec {name} is not installed (have {list(CODECS)})")
+    _selected = CODECS[name]
+
+
+def dumps(obj: Any) -> bytes:
+    """Encodes `obj` as (utf-8) JSON"""
+    try:
+        return _selected.dumps(obj)
+    except (TypeError, OverflowError):
+        # e.g. integers beyond 64 bits, which not every library supports
+        return STDLIB.dumps(obj)
+
+
+def loads(data: Union[str, bytes], object_hook: Optional[ObjectHook] = None) -> Any:
+    """
+    Decodes JSON `data`. With an `object_hook`, every decoded object
+    is replaced by the result of the hook, as with json.loads.
+    """
+    if object_hook is not None:
+        # The stdlib calls hooks while decoding, which beats decoding with
+        # a faster library and applying the hook to the result afterwards.
+        return json.loads(data, object_hook=object_hook)
+    try:
+        return _selected.loads(data)
+    except ValueError:
+        # Not every library supports all valid JSON (e.g. integers beyond 64 bits):
+        # the stdlib decides whether the data is valid.
+        return STDLIB.loads(data)
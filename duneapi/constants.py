@@ -93,23 +93,7 @@ FIND_DASHBOARD_POST = """
     }
 """
 
-FIND_QUERY_POST = """
-    query FindQuery(
-        $session_id: Int, 
-        $id: Int!, 
-        $favs_last_24h: Boolean! = false, 
-        $favs_last_7d: Boolean! = false, 
-        $favs_last_30d: Boolean! = false, 
-        $favs_all_time: Boolean! = true
-    ) {
-      queries(where: {id: {_eq: $id}}) {
-        ...Query
-        favorite_queries(where: {user_id: {_eq: $session_id}}, limit: 1) {
-          created_at
-        }
-      }
-    }
-    
+QUERY_FRAGMENTS = """
     fragment Query on queries {
       ...BaseQuery
       ...QueryVisualizations
@@ -181,3 +165,45 @@ FIND_QUERY_POST = """
       }
     }
 """
+
+FIND_QUERY_POST = (
+    """
+    query FindQuery(
+        $session_id: Int,
+        $id: Int!,
+        $favs_last_24h: Boolean! = false,
+        $favs_last_7d: Boolean! = false,
+        $favs_last_30d: Boolean! = false,
+        $favs_all_time: Boolean! = true
+    ) {
+      queries(where: {id: {_eq: $id}}) {
+        ...Query
+        favorite_queries(where: {user_id: {_eq: $session_id}}, limit: 1) {
+          created_at
+        }
+      }
+    }
+    """
+    + QUERY_FRAGMENTS
+)
+
+FIND_QUERIES_POST = (
+    """
+    query FindQueries(
+        $session_id: Int,
+        $ids: [Int!]!,
+        $favs_last_24h: Boolean! = false,
+        $favs_last_7d: Boolean! = false,
+        $favs_last_30d: Boolean! = false,
+        $favs_all_time: Boolean! = true
+    ) {
+      queries(where: {id: {_in: $ids}}) {
+        ...Query
+        favorite_queries(where: {user_id: {_eq: $session_id}}, limit: 1) {
+          created_at
+        }
+      }
+    }
+    """
+    + QUERY_FRAGMENTS
+)
@@ -4,17 +4,23 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import tempfile
 import time
-
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Any, Optional
 
 from .api import DuneAPI
-from .constants import FIND_DASHBOARD_POST, FIND_QUERY_POST
+from .constants import FIND_DASHBOARD_POST, FIND_QUERIES_POST
 from .logger import set_log
+from .response import pre_validate_response
 from .types import DuneQuery, DashboardTile, Post, Network, QueryParameter
 from .util import duplicates
 
 BASE_URL = "https://dune.xyz"
+# Number of queries fetched per FindQueries request.
+FIND_QUERIES_CHUNK_SIZE = 50
 log = set_log(__name__)
 
 
@@ -22,6 +28,48 @@ class DuplicateQueryError(Exception):
     """Basic extension of Exception class"""
 
 
+@dataclass
+class TileUpdate:
+    """Outcome of updating (i.e. upserting and executing) a single dashboard query"""
+
+    query_id: int
+    job_id: Optional[str] = None
+    elapsed: float = 0.0
+    retries: int = 0
+    error: Optional[str] = None
+    # False when the upsert was skipped, because the query was unchanged.
+    upserted: bool = True
+
+
+def load_manifest(path: str) -> dict[str, str]:
+    """
+    Loads the query fingerprints (by query id) recorded at the last update.
+    A missing or unreadable manifest is empty (so that all queries are upserted).
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as manifest_file:
+            manifest: dict[str, str] = json.load(manifest_file)
+    except (OSError, ValueError) as err:
+        log.warning(f"Ignoring unreadable manifest {path}: {err}")
+        return {}
+    return manifest
+
+
+def save_manifest(path: str, manifest: dict[str, str]) -> None:
+    """Atomically records the query fingerprints (by query id) of the last update"""
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
 class DuneDashboard:
     """
     A Dune Dashboard consists of a family of queries
@@ -92,22 +140,14 @@ class DuneDashboard:
         )
         meta = response.json()["data"]["dashboards"][0]
         widgets = meta["visualization_widgets"]
-        queries = set()
-        for widget in widgets:
-            query_data = widget["visualization"]
-            query_id = query_data["query_details"]["query_id"]
-
-            post = Post(
-                data={
-                    "operationName": "FindQuery",
-                    "variables": {"session_id": 87, "id": query_id},
-                    "query": FIND_QUERY_POST,
-                },
-                key_map={},
+        # Many widgets may visualize the same query: fetch each query only once.
+        query_ids = list(
+            dict.fromkeys(
+                w["visualization"]["query_details"]["query_id"] for w in widgets
             )
-            response = api.post_dune_request(post)
-            log.debug(f"Received Response {response.json()}")
-            query_data = response.json()["data"]["queries"][0]
+        )
+        queries = set()
+        for query_data in cls.find_queries(api, query_ids):
             # Filtering out queries that are not owned by logged-in user.
             if query_data["user"]["name"] == api.username:
                 queries.add(
@@ -146,6 +186,35 @@ class DuneDashboard:
             user=dashboard_owner,
         )
 
+    @staticmethod
+    def find_queries(
+        api: DuneAPI, query_ids: list[int], chunk_size: int = FIND_QUERIES_CHUNK_SIZE
+    ) -> list[dict[str, Any]]:
+        """
+        Fetches the queries with `query_ids` using one request per `chunk_size` ids
+        :return: query documents, in no particular order
+        :raises ValueError: if any of the queries was not found
+        """
+        queries: list[dict[str, Any]] = []
+        for start in range(0, len(query_ids), chunk_size):
+            post = Post(
+                data={
+                    "operationName": "FindQueries",
+                    "variables": {
+                        "session_id": 87,
+                        "ids": query_ids[start : start + chunk_size],
+                    },
+                    "query": FIND_QUERIES_POST,
+                },
+                key_map={"queries": set()},
+            )
+            response = api.post_dune_request(post)
+            queries += pre_validate_response(response, post.key_map)["queries"]
+        missing = set(query_ids) - {query["id"] for query in queries}
+        if missing:
+            raise ValueError(f"Queries {sorted(missing)} not found")
+        return queries
+
     @staticmethod
     def dump_config(name: str, owner: str, slug: str, queries: list[DuneQuery]) -> None:
         """
@@ -212,27 +281,80 @@ class DuneDashboard:
             queries=queries,
         )
 
-    def update(self) -> None:
-        """Creates a dune connection and updates/refreshes all dashboard queries"""
-        for tile in self.queries:
-            self.api.initiate_query(tile)
-            retries, success = 0, False
-            # TODO - this is not a very good way of retrying
-            # Should create custom errors (instead of using Runtime everywhere)
-            while not success and retries < 3:
-                try:
-                    self.api.execute(tile.query_id, tile.parameters)
-                    success = True
-                except RuntimeError as err:
-                    retries += 1
-                    sleep_time = 2 * retries
-                    log.warning(
-                        f"Query execution failed due to {err}. "
-                        f"Sleeping {sleep_time} seconds and trying again."
-                    )
-                    time.sleep(sleep_time)
-            if not success:
-                raise SystemExit("Failed to update dashboard, max retries exceeded!")
+    def _update_tile(
+        self, tile: DuneQuery, max_retries: int, upsert: bool = True
+    ) -> TileUpdate:
+        """Upserts and executes a single tile, retrying independently of others"""
+        report = TileUpdate(query_id=tile.query_id, upserted=upsert)
+        start = time.monotonic()
+        while report.job_id is None:
+            try:
+                if upsert:
+                    self.api.initiate_query(tile, minimal=True)
+                report.job_id = self.api.execute(tile.query_id, tile.parameters)
+                report.error = None
+            except RuntimeError as err:
+                report.error = str(err)
+                if report.retries >= max_retries:
+                    break
+                report.retries += 1
+                sleep_time = 2 * report.retries
+                log.warning(
+                    f"Query {tile.query_id} execution failed due to {err}. "
+                    f"Sleeping {sleep_time} seconds and trying again."
+                )
+                time.sleep(sleep_time)
+        report.elapsed = time.monotonic() - start
+        return report
+
+    def update(
+        self,
+        max_workers: int = 1,
+        max_retries: int = 3,
+        strict: bool = True,
+        manifest: Optional[str] = None,
+    ) -> list[TileUpdate]:
+        """
+        Creates a dune connection and updates/refreshes all dashboard queries
+        :param max_workers: number of tiles updated concurrently
+        :param max_retries: retries per tile, before the tile is reported as failed
+        :param strict: exit when any tile failed to update (after trying all tiles)
+        :param manifest: path of a file recording the fingerprints of upserted queries.
+            When given, only queries that changed since the last update are upserted
+            (all queries are still executed).
+        :return: report of the update of each tile, in the order of `self.queries`
+        """
+        fingerprints = {str(q.query_id): q.fingerprint() for q in self.queries}
+        known = load_manifest(manifest) if manifest is not None else {}
+        upserts = [
+            known.get(str(q.query_id)) != fingerprints[str(q.query_id)]
+            for q in self.queries
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            reports = list(
+                executor.map(
+                    self._update_tile, self.queries, repeat(max_retries), upserts
+                )
+            )
+        if manifest is not None:
+            log.info(
+                f"Skipped upsert of {sum(not r.upserted for r in reports)} "
+                f"unchanged queries"
+            )
+            for report in reports:
+                query_id = str(report.query_id)
+                if report.job_id is not None:
+                    known[query_id] = fingerprints[query_id]
+                elif report.upserted:
+                    # Upsert may not have happened, so check again next time.
+                    known.pop(query_id, None)
+            save_manifest(manifest, known)
+        failed = [report for report in reports if report.error is not None]
+        if failed and strict:
+            raise SystemExit(
+                f"Failed to update dashboard, max retries exceeded for {failed}!"
+            )
+        return reports
 
     def __str__(self) -> str:
         names = "\n".join(
@@ -1,7 +1,7 @@
 """Utility code for I/O related tasks"""
 import csv
 import os
-from dataclasses import fields, astuple, dataclass, is_dataclass
+from dataclasses import fields, dataclass, is_dataclass
 from typing import Any
 
 FILE_OUT_PATH = os.environ.get("FILE_OUT_PATH", "./out")
@@ -36,7 +36,8 @@ def write_to_csv(data_list: list[Any], outfile: File) -> None:
         sample = data_list[0]
         assert is_dataclass(sample), "Method only accepts lists of type dataclass"
         headers = [f.name for f in fields(sample)]
-        data_tuple = [astuple(x) for x in data_list]
+        # Shallow field tuples: dataclasses.astuple would deep copy every record.
+        data_tuple = [tuple(getattr(x, name) for name in headers) for x in data_list]
 
         dict_writer = csv.DictWriter(out_file, headers, lineterminator="\n")
         dict_writer.writeheader()
@@ -0,0 +1,113 @@
+"""
+Compiled conversion of query result rows into dataclass instances.
+
+For each dataclass and column mapping, a specialised conversion function is
+generated once (and cached), so that mapping a row costs little more than
+the construction of the dataclass instance itself.
+"""
+from __future__ import annotations
+
+from dataclasses import Field, fields, is_dataclass
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Optional, Type, TypeVar, Union
+
+from .types import ColumnarResults, DuneRecord, QueryResults
+
+T = TypeVar("T")
+
+Converter = Callable[[Any], Any]
+# field name -> column name, or (column name, converter)
+Mapping = dict[str, Union[str, tuple[str, Converter]]]
+
+# Number of compiled mappers kept. Converters are part of the key, so mappings
+# with inline lambdas compile a new mapper per call: define converters once.
+MAPPER_CACHE_SIZE = 256
+
+
+def _call(init_fields: list[Field[Any]], arguments: dict[str, str]) -> str:
+    """
+    Source of the constructor arguments, from the source of each mapped field's
+    value (in `arguments`, by field name). Leading fields are passed
+    positionally (in declaration order), up to the first unmapped or
+    keyword-only (Python 3.10+) field.
+    """
+    arguments = dict(arguments)
+    positional = []
+    for init_field in init_fields:
+        if init_field.name not in arguments or getattr(init_field, "kw_only", False):
+            break
+        positional.append(arguments.pop(init_field.name))
+    return ", ".join(
+        positional + [f"{name}={value}" for name, value in arguments.items()]
+    )
+
+
+def _compile(
+    cls: Type[T], mapping: Mapping, columns: Optional[tuple[str, ...]]
+) -> Callable[[Any], T]:
+    """
+    Generates the source of a function converting one row into `cls`.
+    Rows are dicts (by column name) when `columns` is None,
+    or tuples of values in the order of `columns` otherwise.
+    """
+    assert is_dataclass(cls), f"{cls} is not a dataclass"
+    entries: dict[str, tuple[str, Optional[Converter]]] = {
+        name: (target, None) if isinstance(target, str) else target
+        for name, target in mapping.items()
+    }
+    init_fields = [f for f in fields(cls) if f.init]
+    unknown = set(entries) - {f.name for f in init_fields}
+    assert not unknown, f"{cls.__name__} has no fields {unknown}"
+
+    namespace: dict[str, Any] = {"cls": cls}
+    arguments = {}
+    for name, (column, converter) in entries.items():
+        value = (
+            f"row[{column!r}]" if columns is None else f"row[{columns.index(column)}]"
+        )
+        if converter is not None:
+            namespace[f"convert_{name}"] = converter
+            value = f"convert_{name}({value})"
+        arguments[name] = value
+
+    source = f"def map_row(row):\n    return cls({_call(init_fields, arguments)})\n"
+    # pylint: disable=exec-used
+    exec(source, namespace)
+    mapper: Callable[[Any], T] = namespace["map_row"]
+    return mapper
+
+
+@lru_cache(maxsize=MAPPER_CACHE_SIZE)
+def _cached_mapper(key: tuple[Any, ...]) -> Callable[[Any], Any]:
+    cls, entries, columns = key
+    return _compile(cls, dict(entries), columns)
+
+
+def record_mapper(
+    cls: Type[T], mapping: Mapping, columns: Optional[list[str]] = None
+) -> Callable[[Any], T]:
+    """
+    Returns the (cached) function converting a row into an instance of `cls`.
+    :param cls: dataclass (with or without __slots__) to construct
+    :param mapping: field name -> column name or (column name, converter),
+        where converters should be long-lived functions (not inline lambdas)
+        for the compiled mapper to be reused
+    :param columns: column order of tuple rows; dict rows are expected if None
+    """
+    column_key = tuple(columns) if columns is not None else None
+    key = (cls, tuple(mapping.items()), column_key)
+    mapper: Callable[[Any], T] = _cached_mapper(key)
+    return mapper
+
+
+def map_results(
+    cls: Type[T],
+    results: Union[QueryResults, ColumnarResults, Iterable[DuneRecord]],
+    mapping: Mapping,
+) -> list[T]:
+    """Converts all rows of `results` into instances of `cls`"""
+    if isinstance(results, ColumnarResults):
+        map_row = record_mapper(cls, mapping, results.columns)
+        return list(map(map_row, results))
+    rows = results.data if isinstance(results, QueryResults) else results
+    return list(map(record_mapper(cls, mapping), rows))
@@ -0,0 +1,130 @@
+"""Strategies deciding how long to wait between job completion polls"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Iterator, Optional
+
+# Fraction of the previously observed runtime slept through before the first poll.
+EXPECTED_RUNTIME_FRACTION = 0.8
+
+
+# pylint: disable=too-few-public-methods
+class PollingStrategy(ABC):
+    """Base class of polling strategies used while awaiting query execution"""
+
+    @abstractmethod
+    def intervals(self, expected_runtime: Optional[float] = None) -> Iterator[float]:
+        """
+        Yields the number of seconds to sleep before each subsequent poll.
+        :param expected_runtime: seconds the same query took previously (if known)
+        """
+
+
+class FixedPolling(PollingStrategy):
+    """Polls at a constant interval (the behaviour of `ping_frequency`)"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    def intervals(self, expected_runtime: Optional[float] = None) -> Iterator[float]:
+        while True:
+            yield self.interval
+
+
+class BackoffPolling(PollingStrategy):
+    """
+    Starts with short intervals, so that fast queries return promptly,
+    and backs off exponentially (with jitter) up to `maximum` for long ones.
+    Given the runtime of a previous execution, most of it is slept through
+    at once (bounded only by the deadline of the poll), before polling closely.
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.5,
+        factor: float = 2.0,
+        maximum: float = 5.0,
+        jitter: float = 0.1,
+    ):
+        assert 0 < initial <= maximum, f"invalid interval bounds {initial}, {maximum}"
+        assert factor >= 1, f"backoff factor {factor} must be at least 1"
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def intervals(self, expected_runtime: Optional[float] = None) -> Iterator[float]:
+        if expected_runtime:
+            # Sleep through most of the previously observed runtime at once,
+            # then poll closely around the point of expected completion.
+            yield self._jittered(expected_runtime * EXPECTED_RUNTIME_FRACTION)
+        delay = self.initial
+        while True:
+            yield self._jittered(delay)
+            delay = min(delay * self.factor, self.maximum)
+
+
+def client_polling(ping_frequency: float) -> PollingStrategy:
+    """
+    Default polling of the Dune clients: polls start fast and back off
+    to at most `ping_frequency` seconds (polling without pause if it is 0).
+    """
+    if ping_frequency <= 0:
+        return FixedPolling(0)
+    return BackoffPolling(initial=min(0.5, ping_frequency), maximum=ping_frequency)
+
+
+def _timeout_error(description: str, timeout: Optional[float]) -> TimeoutError:
+    return TimeoutError(f"{description} did not complete within {timeout} seconds")
+
+
+def poll_until(
+    done: Callable[[], bool],
+    intervals: Iterator[float],
+    timeout: Optional[float] = None,
+    description: str = "Polling",
+) -> None:
+    """
+    Calls `done` immediately and then after each of the `intervals`, until it
+    returns True or, after `timeout` seconds (or the last of finitely many
+    intervals), raises a TimeoutError.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for interval in intervals:
+        if done():
+            return
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _timeout_error(description, timeout)
+            interval = min(interval, remaining)
+        time.sleep(interval)
+    if not done():
+        raise _timeout_error(description, timeout)
+
+
+async def async_poll_until(
+    done: Callable[[], Awaitable[bool]],
+    intervals: Iterator[float],
+    timeout: Optional[float] = None,
+    description: str = "Polling",
+) -> None:
+    """Coroutine equivalent of `poll_until`, sleeping with asyncio.sleep"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for interval in intervals:
+        if await done():
+            return
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _timeout_error(description, timeout)
+            interval = min(interval, remaining)
+        await asyncio.sleep(interval)
+    if not await done():
+        raise _timeout_error(description, timeout)
@@ -1,12 +1,62 @@
 """Handles Validation and partial Generic Response Data Parsing"""
-from typing import Any
+from __future__ import annotations
+
+from typing import Any, Union
 
 from requests import Response
 
+from . import codec
 from .types import ListInnerResponse, DictInnerResponse, KeyMap
 
 
-def pre_validate_response(response: Response, key_map: KeyMap) -> dict[str, Any]:
+class DuneResponse:
+    """
+    Response to a Dune post whose json body is decoded at most once,
+    no matter how many times it is inspected (by logging, validation or parsing).
+    """
+
+    def __init__(self, response: Response):
+        self.response = response
+        self._json: Any = None
+        self._decoded = False
+
+    @classmethod
+    def wrap(cls, response: Union[Response, DuneResponse]) -> DuneResponse:
+        """Wraps a plain `requests.Response` (if it isn't wrapped already)"""
+        if isinstance(response, DuneResponse):
+            return response
+        return cls(response)
+
+    @property
+    def status_code(self) -> int:
+        """HTTP status code of the response"""
+        return self.response.status_code
+
+    @property
+    def text(self) -> str:
+        """Undecoded body of the response"""
+        return self.response.text
+
+    def json(self) -> Any:
+        """The decoded json body of the response"""
+        if not self._decoded:
+            self._json = codec.loads(self.response.content)
+            self._decoded = True
+        return self._json
+
+    @property
+    def data(self) -> dict[str, Any]:
+        """The "data" part of the decoded response"""
+        data: dict[str, Any] = self.json()["data"]
+        return data
+
+    def __repr__(self) -> str:
+        return repr(self.response)
+
+
+def pre_validate_response(
+    response: Union[Response, DuneResponse], key_map: KeyMap
+) -> dict[str, Any]:
     """
     Validates the outermost (generic) part of Dune response data.
     Expects "data" to be a key in the response json and that the
@@ -15,7 +65,7 @@ def pre_validate_response(response: Response, key_map: KeyMap) -> dict[str, Any]
     if response.status_code != 200:
         raise RuntimeError("Dune post failed with", response)
 
-    response_json = response.json()
+    response_json = DuneResponse.wrap(response).json()
     if "errors" in response_json.keys() and len(response_json["errors"]) > 0:
         raise RuntimeError(
             f"Dune API Request failed with errors {response_json['errors']}"
@@ -38,7 +88,7 @@ def pre_validate_response(response: Response, key_map: KeyMap) -> dict[str, Any]
 
 
 def validate_and_parse_dict_response(
-    response: Response, key_map: KeyMap
+    response: Union[Response, DuneResponse], key_map: KeyMap
 ) -> DictInnerResponse:
     """
     Validates responses of dict inner type, and
@@ -56,7 +106,7 @@ def validate_and_parse_dict_response(
 
 
 def validate_and_parse_list_response(
-    response: Response, key_map: KeyMap
+    response: Union[Response, DuneResponse], key_map: KeyMap
 ) -> ListInnerResponse:
     """
     Validates responses with list inner type, and
@@ -0,0 +1,62 @@
+"""
+Coalescing of identical concurrent calls: while a call for some key is in flight,
+further calls with the same key wait for (and share) its outcome instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+# pylint: disable=too-few-public-methods
+class SingleFlight(Generic[T]):
+    """Coalesces identical calls made concurrently from several threads"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future[T]] = {}
+
+    def call(self, key: str, function: Callable[[], T]) -> T:
+        """
+        Returns the result of `function()`, or of the call in flight for `key`.
+        Exceptions are raised to every caller sharing the call.
+        """
+        with self._lock:
+            flight = self._calls.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._calls[key] = Future()
+        if not leader:
+            return flight.result()
+        try:
+            result = function()
+        except BaseException as err:
+            flight.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+        flight.set_result(result)
+        return result
+
+
+class AsyncSingleFlight(Generic[T]):
+    """Coalesces identical calls made concurrently from several tasks"""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Future[T]] = {}
+
+    async def call(self, key: str, function: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the result of `await function()`, or of the call in flight for `key`.
+        Cancelling one caller does not cancel the call shared with the others.
+        """
+        flight = self._calls.get(key)
+        if flight is None:
+            flight = self._calls[key] = asyncio.ensure_future(function())
+            flight.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(flight)
@@ -0,0 +1,190 @@
+"""
+Incremental parsing of FindResultDataByJob responses, so that result rows
+can be processed while they are downloaded, without holding the whole
+response (or its decoded object tree) in memory.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from itertools import islice
+from types import TracebackType
+from typing import Any, Callable, Iterable, Iterator, Optional, Type
+
+from .types import DuneRecord, MetaData
+
+RESULT_KEY = "get_result_by_job_id"
+# Drop the consumed part of the buffer once it grows beyond this many characters.
+COMPACT_THRESHOLD = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _JsonBuffer:
+    """Decoded text of a byte stream, from which json values are read one by one"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def _fill(self) -> bool:
+        """Reads the next chunk into the buffer, returns False at end of stream"""
+        if self.exhausted:
+            return False
+        if self.pos > COMPACT_THRESHOLD:
+            self.text, self.pos = self.text[self.pos :], 0
+        try:
+            self.text += self._utf8.decode(next(self._chunks))
+        except StopIteration:
+            self.text += self._utf8.decode(b"", final=True)
+            self.exhausted = True
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at the end of the stream)"""
+        while True:
+            match = _WHITESPACE.match(self.text, self.pos)
+            self.pos = match.end() if match else self.pos
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consumes `char`, which must be the next non-whitespace character"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid result stream: expected {char!r} got {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Reads the next complete json value"""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A value ending the buffer (e.g. a number) may continue in the next chunk
+            if end == len(self.text) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+# pylint: disable=too-few-public-methods
+class ResultStream:
+    """
+    Iterates over the rows of a FindResultDataByJob response as it arrives.
+    Result metadata and errors precede the rows in the response, so query errors
+    are raised before any row is yielded and `meta` is set once rows are yielded.
+    The underlying response is closed once iteration ends; streams abandoned
+    early should be closed (or used as context manager) to release the connection.
+    """
+
+    meta: Optional[MetaData]
+
+    def __init__(
+        self, chunks: Iterable[bytes], close: Optional[Callable[[], None]] = None
+    ):
+        """
+        :param chunks: the response body, in chunks of bytes
+        :param close: releases the response (e.g. Response.close)
+        """
+        self._buffer = _JsonBuffer(chunks)
+        self._fields: dict[str, Any] = {}
+        self._close = close
+        self.meta = None
+
+    def close(self) -> None:
+        """Releases the underlying response (and its connection)"""
+        close, self._close = self._close, None
+        if close is not None:
+            close()
+
+    def __enter__(self) -> ResultStream:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def _validate(self) -> None:
+        """Validates the response fields received so far"""
+        query_errors = self._fields.get("query_errors")
+        if query_errors:
+            raise RuntimeError(f"Dune API Request failed with errors {query_errors}")
+        query_results = self._fields.get("query_results")
+        if query_results is not None and self.meta is None:
+            assert len(query_results) == 1, f"Unexpected query_results {query_results}"
+            self.meta = MetaData.from_dict(query_results[0])
+
+    def _rows(self) -> Iterator[DuneRecord]:
+        buffer = self._buffer
+        buffer.expect("[")
+        if buffer.peek() == "]":
+            buffer.pos += 1
+            return
+        while True:
+            yield buffer.value()["data"]
+            separator = buffer.peek()
+            buffer.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Invalid result stream: unexpected {separator!r}")
+
+    def _object(self, data: bool) -> Iterator[DuneRecord]:
+        """Reads a json object, streaming the rows found in its result array"""
+        buffer = self._buffer
+        buffer.expect("{")
+        if buffer.peek() == "}":
+            buffer.pos += 1
+            return
+        while True:
+            key = buffer.value()
+            buffer.expect(":")
+            if not data and key == "data":
+                yield from self._object(data=True)
+            elif data and key == RESULT_KEY:
+                self._validate()
+                yield from self._rows()
+                self._fields[key] = []
+            else:
+                self._fields[key] = buffer.value()
+            separator = buffer.peek()
+            buffer.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Invalid result stream: unexpected {separator!r}")
+
+    def __iter__(self) -> Iterator[DuneRecord]:
+        try:
+            yield from self._object(data=False)
+        finally:
+            self.close()
+        errors = self._fields.get("errors")
+        if errors:
+            raise RuntimeError(f"Dune API Request failed with errors {errors}")
+        if RESULT_KEY not in self._fields:
+            raise ValueError(f"response json missing '{RESULT_KEY}'")
+        self._validate()
+
+
+def batched(rows: Iterable[DuneRecord], size: int) -> Iterator[list[DuneRecord]]:
+    """Groups `rows` into lists of (at most) `size` rows"""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,110 @@
+"""Tracks the completion of many outstanding Dune executions at once"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Optional
+
+from .logger import set_log
+from .polling import PollingStrategy, poll_until
+from .response import pre_validate_response
+from .types import DuneQuery, DuneRecord
+
+if TYPE_CHECKING:
+    from .api import DuneAPI
+
+log = set_log(__name__)
+
+# Number of jobs checked per GetJobsStatus request.
+BATCH_SIZE = 100
+
+
+class JobTracker:
+    """
+    Polls the status of all tracked jobs with a single request per tick
+    (rather than one GetQueuePosition request per job) and resolves
+    each job's future with its results as soon as the job completes.
+    """
+
+    def __init__(
+        self,
+        api: DuneAPI,
+        polling: Optional[PollingStrategy] = None,
+        batch_size: int = BATCH_SIZE,
+    ):
+        self.api = api
+        self.polling = polling if polling is not None else api.polling
+        self.batch_size = batch_size
+        self._pending: dict[str, Future[list[DuneRecord]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def track(self, job_id: str) -> Future[list[DuneRecord]]:
+        """Registers `job_id` and returns a future resolving to its results"""
+        with self._lock:
+            if job_id not in self._pending:
+                self._pending[job_id] = Future()
+            return self._pending[job_id]
+
+    def _completed(self, job_ids: list[str]) -> list[str]:
+        """Returns the subset of `job_ids` that are no longer in the queue"""
+        completed = []
+        for start in range(0, len(job_ids), self.batch_size):
+            batch = job_ids[start : start + self.batch_size]
+            post = DuneQuery.get_queue_positions(batch)
+            response = self.api.post_dune_request(post)
+            statuses = pre_validate_response(response, post.key_map)
+            completed += [
+                job_id
+                for alias, job_id in zip(post.data["variables"], batch)
+                if statuses[alias] is None
+            ]
+        return completed
+
+    def poll(self) -> list[str]:
+        """
+        Checks all pending jobs once, then fetches the results of those
+        that have completed and resolves their futures.
+        :return: ids of the jobs resolved by this poll
+        """
+        with self._lock:
+            job_ids = list(self._pending)
+        if not job_ids:
+            return []
+        completed = self._completed(job_ids)
+        for job_id in completed:
+            with self._lock:
+                future = self._pending[job_id]
+            try:
+                future.set_result(self.api.fetch_query_results(job_id).data)
+            # Any failure (e.g. a RequestException) must resolve the future,
+            # or callers awaiting its result would block forever.
+            except Exception as err:  # pylint: disable=broad-except
+                log.warning(f"Failed to fetch results of job {job_id}: {err}")
+                future.set_exception(err)
+            with self._lock:
+                del self._pending[job_id]
+        return completed
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Polls until every tracked job is resolved.
+        :param timeout: seconds after which to give up with a TimeoutError
+        """
+
+        def resolved() -> bool:
+            self.poll()
+            remaining_jobs = len(self)
+            if remaining_jobs > 0:
+                log.debug(f"Waiting for {remaining_jobs} jobs to complete...")
+            return remaining_jobs == 0
+
+        poll_until(
+            resolved,
+            self.polling.intervals(),
+            timeout,
+            description=f"Tracking of {len(self)} jobs",
+        )
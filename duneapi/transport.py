@@ -0,0 +1,99 @@
+"""
+HTTP transport settings of the Dune clients: connection pooling, compression,
+transport-level retries and timeouts per kind of request.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from requests import Session
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from .types import Post
+
+# Operations whose responses hold (potentially large) query results.
+DOWNLOAD_OPERATIONS = frozenset({"FindResultDataByJob", "FindResultPageByJob"})
+# Gateway errors, retried for idempotent methods only: the upstream may have
+# processed a request (e.g. a POST starting an execution) before the error.
+RETRY_STATUSES = (502, 503, 504)
+
+Timeout = tuple[float, float]
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass(frozen=True)
+class TransportConfig:
+    """
+    HTTP settings of a client session.
+    Pool sizes should be at least the number of threads sharing the client,
+    so that connections are kept alive rather than discarded and rebuilt.
+    """
+
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    # Transport-level retries of failed connections (for all requests)
+    # and of gateway errors (for idempotent ones, i.e. not GraphQL POSTs)
+    max_retries: int = 3
+    backoff_factor: float = 0.3
+    connect_timeout: float = 10.0
+    # Read timeouts: short for status polls and other small requests,
+    # long for result downloads.
+    request_timeout: float = 30.0
+    download_timeout: float = 600.0
+    # Request compressed responses (with every encoding urllib3 can decode)
+    compression: bool = True
+    # Replaces the HTTPAdapter built from these settings (e.g. with a local fake)
+    adapter: Optional[BaseAdapter] = None
+
+    @classmethod
+    def for_workers(cls, workers: int) -> TransportConfig:
+        """Settings with connection pools large enough for `workers` threads"""
+        size = max(workers, cls.pool_maxsize)
+        return cls(pool_connections=size, pool_maxsize=size)
+
+    @property
+    def poll_timeout(self) -> Timeout:
+        """(connect, read) timeout of status polls and other small requests"""
+        return self.connect_timeout, self.request_timeout
+
+    def timeout(self, post: Post) -> Timeout:
+        """(connect, read) timeout of `post`, by its operation"""
+        if post.data.get("operationName") in DOWNLOAD_OPERATIONS:
+            return self.connect_timeout, self.download_timeout
+        return self.poll_timeout
+
+    def build_adapter(self) -> BaseAdapter:
+        """The (pooling and retrying) adapter performing the requests"""
+        if self.adapter is not None:
+            return self.adapter
+        retries = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            # A request may have been processed when reading its response fails.
+            read=0,
+            status=self.max_retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False,
+        )
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retries,
+        )
+
+    def build_session(self) -> Session:
+        """A new session with these settings"""
+        session = Session()
+        adapter = self.build_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["connection"] = "keep-alive"
+        session.headers["accept-encoding"] = (
+            ACCEPT_ENCODING if self.compression else "identity"
+        )
+        return session
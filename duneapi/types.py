@@ -4,21 +4,24 @@ A collection of types associated with Dune Analytics API.
 Includes also, the base classes for a Dune queries, parameters and Request Post Data
 All operations/routes available for interaction with Dune API - looks like graphQL
 """
+# pylint: disable=too-many-lines
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from datetime import datetime
 from enum import Enum
-from typing import Any, Collection, Optional
-from web3 import Web3
+from typing import Any, Collection, Iterable, Iterator, Optional, Sequence
 
 from dotenv import load_dotenv
 
+from . import codec
 from .logger import set_log
-from .util import datetime_parser, open_query, postgres_date
+from .util import datetime_parser, open_query, parse_datetime, postgres_date
 
 log = set_log(__name__)
 
@@ -31,8 +34,41 @@ DictInnerResponse = dict[str, dict[str, Any]]
 
 DuneRecord = dict[str, str]
 
+
+class _Frozen:
+    """Base of immutable value types with __slots__ (set once, by _init)"""
+
+    __slots__: tuple[str, ...] = ()
+
+    def _init(self, **values: Any) -> None:
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+# Number of distinct addresses whose checksum (and shared instance) is kept.
+ADDRESS_CACHE_SIZE = 1 << 16
+
+_ADDRESS_PATTERN = re.compile(r"(0x)?[0-9a-f]{40}", flags=re.IGNORECASE)
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def to_checksum_address(address: str) -> str:
+    """Converts a (valid) hex address into its EIP-55 check-summed format"""
+    # web3 (with its large dependency tree) takes long to import,
+    # so it is only imported once addresses are actually used.
+    from web3 import Web3  # pylint: disable=import-outside-toplevel
+
+    return str(Web3.toChecksumAddress(address))
+
+
 # pylint: disable=too-few-public-methods
-class Address:
+class Address(_Frozen):
     """
     Class representing Ethereum Address as a hexadecimal string of length 42.
     The string must begin with '0x' and the other 40 characters
@@ -40,31 +76,59 @@ class Address:
     are validated and stored in their check-summed format.
     """
 
+    __slots__ = ("address", "_key")
+    address: str
+    _key: str
+
     def __init__(self, address: str):
         # Dune uses \x instead of 0x (i.e. bytea instead of hex string)
         # This is just a courtesy to query writers,
         # so they don't have to convert all addresses to hex strings manually
         address = address.replace("\\x", "0x")
-        if Address._is_valid(address):
-            self.address: str = Web3.toChecksumAddress(address)
-        else:
+        if not Address._is_valid(address):
             raise ValueError(f"Invalid Ethereum Address {address}")
+        # Lower case hex digits: compared, ordered and hashed instead of `address`
+        key = address[-40:].lower()
+        self._init(_key=key, address=to_checksum_address("0x" + key))
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return Address, (self.address,)
 
     def __str__(self) -> str:
         return str(self.address)
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Address):
-            return self.address == other.address
+            return self._key == other._key
         return False
 
     def __lt__(self, other: object) -> bool:
         if isinstance(other, Address):
-            return str(self).lower() < str(other).lower()
+            return self._key < other._key
         return False
 
     def __hash__(self) -> int:
-        return self.address.__hash__()
+        return self._key.__hash__()
+
+    @classmethod
+    def many(cls, addresses: Iterable[str]) -> list[Address]:
+        """
+        Constructs Addresses from many (0x or \\x prefixed) strings at once.
+        Each distinct address is validated and check-summed only once,
+        and equal addresses share one (interned) instance.
+        """
+        distinct: dict[str, Address] = {}
+        result = []
+        for address in addresses:
+            instance = distinct.get(address)
+            if instance is None:
+                normalized = address.replace("\\x", "0x")
+                if not Address._is_valid(normalized):
+                    raise ValueError(f"Invalid Ethereum Address {normalized}")
+                instance = _interned_address(normalized[-40:].lower())
+                distinct[address] = instance
+            result.append(instance)
+        return result
 
     @classmethod
     def zero(cls) -> Address:
@@ -81,23 +145,25 @@ class Address:
 
     @staticmethod
     def _is_valid(address: str) -> bool:
-        match_result = re.match(
-            pattern=r"^(0x)?[0-9a-f]{40}$", string=address, flags=re.IGNORECASE
-        )
-        return match_result is not None
+        return _ADDRESS_PATTERN.fullmatch(address) is not None
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _interned_address(address: str) -> Address:
+    return Address(address)
 
 
 # pylint: disable=too-few-public-methods
-# TODO - use namedtuple for MetaData and QueryResults
-class MetaData:
+class MetaData(_Frozen):
     """The standard information returned from the Dune API as `query_results`"""
 
+    __slots__ = ("id", "job_id", "error", "runtime", "generated_at", "columns")
     id: str
     job_id: str
     error: Optional[str]
     runtime: int
     generated_at: datetime
-    columns: list[str]
+    columns: tuple[str, ...]
 
     def __init__(self, obj: str):
         """
@@ -115,7 +181,55 @@ class MetaData:
             '__typename': 'query_results'
         }
         """
-        self.__dict__ = json.loads(obj, object_hook=datetime_parser)
+        self._set_fields(codec.loads(obj, object_hook=datetime_parser))
+
+    def _set_fields(self, obj: dict[str, Any]) -> None:
+        generated_at = obj["generated_at"]
+        if isinstance(generated_at, str):
+            generated_at = parse_datetime(generated_at) or generated_at
+        self._init(
+            id=obj["id"],
+            job_id=obj["job_id"],
+            error=obj.get("error"),
+            runtime=obj["runtime"],
+            generated_at=generated_at,
+            columns=tuple(obj["columns"]),
+        )
+
+    @classmethod
+    def from_dict(cls, obj: dict[str, Any]) -> MetaData:
+        """Constructs MetaData from the (decoded) `query_results` of a response"""
+        meta = cls.__new__(cls)
+        meta._set_fields(obj)
+        return meta
+
+    def to_dict(self) -> dict[str, Any]:
+        """Field values by name (as they would be returned from the Dune API)"""
+        return {
+            "id": self.id,
+            "job_id": self.job_id,
+            "error": self.error,
+            "runtime": self.runtime,
+            "generated_at": self.generated_at,
+            "columns": list(self.columns),
+        }
+
+    def _fields(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MetaData):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return MetaData.from_dict, (self.to_dict(),)
+
+    def __repr__(self) -> str:
+        return f"MetaData({self.to_dict()})"
 
 
 class QueryResults:
@@ -133,11 +247,79 @@ class QueryResults:
         assert len(data["query_results"]) == 1, f"Unexpected query_results {data}"
         # Could wrap meta conversion into a try-catch, since we don't really need it.
         # But, I can't think of a broad enough exception that won't trip up the liner.
-        self.meta = MetaData(json.dumps(data["query_results"][0]))
+        self.meta = MetaData.from_dict(data["query_results"][0])
 
         self.data = [rec["data"] for rec in data["get_result_by_job_id"]]
 
 
+class ColumnarResults:
+    """
+    Data results of a Dune Select Query stored column by column
+    (one list per column, in the order of `meta.columns`), instead of a dict per row.
+    Rows are produced on demand as tuples of the column values.
+    """
+
+    meta: Optional[MetaData]
+    columns: list[str]
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        values: list[list[Any]],
+        meta: Optional[MetaData] = None,
+    ):
+        assert len(columns) == len(values), f"{len(values)} values for {columns}"
+        assert len({len(v) for v in values}) <= 1, "columns of different lengths"
+        self.columns = list(columns)
+        self.meta = meta
+        self._values = values
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_response(cls, data: ListInnerResponse) -> ColumnarResults:
+        """Constructs columnar results from the response data of FindResultDataByJob"""
+        assert data.keys() == {
+            "query_results",
+            "get_result_by_job_id",
+            "query_errors",
+        }, f"invalid keys {data.keys()}"
+        assert len(data["query_results"]) == 1, f"Unexpected query_results {data}"
+        meta = MetaData.from_dict(data["query_results"][0])
+        rows = [rec["data"] for rec in data["get_result_by_job_id"]]
+        return cls(
+            columns=meta.columns,
+            values=[[row[name] for row in rows] for name in meta.columns],
+            meta=meta,
+        )
+
+    def __len__(self) -> int:
+        return len(self._values[0]) if self._values else 0
+
+    def column(self, name: str) -> list[Any]:
+        """The values of column `name`"""
+        return self._values[self._index[name]]
+
+    def __getitem__(self, key: int | slice | str) -> Any:
+        """
+        Column values by column name, a row tuple by integer index,
+        or a new ColumnarResults holding the rows of a slice.
+        """
+        if isinstance(key, str):
+            return self.column(key)
+        if isinstance(key, slice):
+            return ColumnarResults(
+                self.columns, [values[key] for values in self._values], self.meta
+            )
+        return tuple(values[key] for values in self._values)
+
+    def __iter__(self) -> Iterator[tuple[Any, ...]]:
+        return zip(*self._values)
+
+    def to_records(self) -> list[DuneRecord]:
+        """Converts to the row-wise representation of QueryResults.data"""
+        return [dict(zip(self.columns, row)) for row in self]
+
+
 class Network(Enum):
     """Enum for supported EVM networks"""
 
@@ -211,9 +393,15 @@ class ParameterType(Enum):
         raise ValueError(f"could not parse Network from '{type_str}'")
 
 
-class QueryParameter:
+class QueryParameter(_Frozen):
     """Class whose instances are Dune Compatible Query Parameters"""
 
+    __slots__ = ("key", "type", "value", "options")
+    key: str
+    type: ParameterType
+    value: Any
+    options: tuple[str, ...]
+
     def __init__(
         self,
         name: str,
@@ -221,12 +409,9 @@ class QueryParameter:
         value: Any,
         options: Optional[list[str]] = None,
     ):
-        if not options:
-            options = []
-        self.key: str = name
-        self.type: ParameterType = parameter_type
-        self.value = value
-        self.options = options
+        self._init(
+            key=name, type=parameter_type, value=value, options=tuple(options or [])
+        )
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, QueryParameter):
@@ -239,6 +424,16 @@ class QueryParameter:
             ]
         )
 
+    def __hash__(self) -> int:
+        return hash((self.key, self.value, self.type))
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return QueryParameter, (self.key, self.type, self.value, list(self.options))
+
+    def with_value(self, value: Any) -> QueryParameter:
+        """Returns a copy of this parameter, with `value` instead"""
+        return QueryParameter(self.key, self.type, value, list(self.options))
+
     @classmethod
     def text_type(cls, name: str, value: str) -> QueryParameter:
         """Constructs a Query parameter of type text"""
@@ -280,7 +475,7 @@ class QueryParameter:
             "value": self._value_str(),
         }
         if self.type == ParameterType.ENUM:
-            results["enumOptions"] = self.options
+            results["enumOptions"] = list(self.options)
         return results
 
     @classmethod
@@ -420,8 +615,42 @@ class DuneQuery:
     def _request_parameters(self) -> list[dict[str, str | list[str]]]:
         return [p.to_dict() for p in self.parameters]
 
-    def upsert_query_post(self) -> Post:
-        """Returns json data for a post of type UpsertQuery"""
+    def fingerprint(self) -> str:
+        """
+        Hash of everything an upsert sends to Dune for this query,
+        used to detect whether the query needs to be upserted at all.
+        """
+        content = {
+            "id": self.query_id,
+            "name": self.name,
+            "description": self.description,
+            "query": self.raw_sql,
+            "dataset_id": self.network.value,
+            "parameters": self._request_parameters(),
+        }
+        serialized = json.dumps(content, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(serialized).hexdigest()
+
+    def result_key(self) -> str:
+        """
+        Hash identifying the results of executing this query: its id, network,
+        SQL and parameters (but not its name or description).
+        """
+        content = {
+            "id": self.query_id,
+            "dataset_id": self.network.value,
+            "query": hashlib.sha256(self.raw_sql.encode("utf-8")).hexdigest(),
+            "parameters": self._request_parameters(),
+        }
+        serialized = json.dumps(content, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(serialized).hexdigest()
+
+    def upsert_query_post(self, minimal: bool = False) -> Post:
+        """
+        Returns json data for a post of type UpsertQuery
+        :param minimal: only request the `id` and `updated_at` of the upserted query,
+            rather than the entire query document (including its SQL) back.
+        """
         object_data: dict[str, Any] = {
             "id": self.query_id,
             "schedule": None,
@@ -442,6 +671,39 @@ class DuneQuery:
                 },
             },
         }
+        on_conflict = {
+            "constraint": "queries_pkey",
+            "update_columns": [
+                "dataset_id",
+                "name",
+                "description",
+                "query",
+                "schedule",
+                "is_archived",
+                "is_temp",
+                "tags",
+                "parameters",
+            ],
+        }
+        if minimal:
+            return Post(
+                data={
+                    "operationName": "UpsertQuery",
+                    "variables": {"object": object_data, "on_conflict": on_conflict},
+                    "query": """
+                    mutation UpsertQuery(
+                      $object: queries_insert_input!
+                      $on_conflict: queries_on_conflict!
+                    ) {
+                      insert_queries_one(object: $object, on_conflict: $on_conflict) {
+                        id
+                        updated_at
+                      }
+                    }
+                    """,
+                },
+                key_map={"insert_queries_one": {"id", "updated_at"}},
+            )
         key_map = {
             "insert_queries_one": {
                 "id",
@@ -469,20 +731,7 @@ class DuneQuery:
                 "operationName": "UpsertQuery",
                 "variables": {
                     "object": object_data,
-                    "on_conflict": {
-                        "constraint": "queries_pkey",
-                        "update_columns": [
-                            "dataset_id",
-                            "name",
-                            "description",
-                            "query",
-                            "schedule",
-                            "is_archived",
-                            "is_temp",
-                            "tags",
-                            "parameters",
-                        ],
-                    },
+                    "on_conflict": on_conflict,
                     "session_id": 0,  # must be an int, but value is irrelevant
                 },
                 "query": """
@@ -571,11 +820,53 @@ class DuneQuery:
             key_map=key_map,
         )
 
+    def find_latest_result(self) -> Post:
+        """
+        Returns json data for a post of type GetResult, looking up
+        the latest execution of this query (with its parameters) on Dune,
+        along with the SQL and network of the query as saved there.
+        """
+        query = """
+        query GetResult($query_id: Int!, $parameters: [Parameter!]) {
+          get_result_v2(query_id: $query_id, parameters: $parameters) {
+            job_id
+            result_id
+            error_id
+          }
+          queries(where: {id: {_eq: $query_id}}) {
+            query
+            dataset_id
+            updated_at
+          }
+        }
+        """
+        return Post(
+            data={
+                "operationName": "GetResult",
+                "variables": {
+                    "query_id": self.query_id,
+                    "parameters": self._request_parameters(),
+                },
+                "query": query,
+            },
+            key_map={
+                "get_result_v2": {"job_id", "result_id", "error_id"},
+                "queries": {"query", "dataset_id", "updated_at"},
+            },
+        )
+
     @staticmethod
-    def find_result_by_job(job_id: str) -> Post:
-        """Returns json data for a post of type FindResultDataByResult"""
+    def find_result_by_job(job_id: str, limit: Optional[int] = None) -> Post:
+        """
+        Returns json data for a post of type FindResultDataByResult
+        :param limit: only fetch the first `limit` rows (with all the metadata)
+        """
+        # An omitted (nullable) $limit variable leaves the argument out altogether.
+        variables: dict[str, Any] = {"job_id": job_id}
+        if limit is not None:
+            variables["limit"] = limit
         query = """
-        query FindResultDataByJob($job_id: uuid!) {
+        query FindResultDataByJob($job_id: uuid!, $limit: Int) {
           query_results(where: {job_id: {_eq: $job_id}, error: {_is_null: true}}) {
             id
             job_id
@@ -592,7 +883,7 @@ class DuneQuery:
             type
             generated_at
           }
-          get_result_by_job_id(args: {want_job_id: $job_id}) {
+          get_result_by_job_id(args: {want_job_id: $job_id}, limit: $limit) {
             data
           }
         }
@@ -600,7 +891,7 @@ class DuneQuery:
         return Post(
             data={
                 "operationName": "FindResultDataByJob",
-                "variables": {"job_id": job_id},
+                "variables": variables,
                 "query": query,
             },
             key_map={
@@ -624,6 +915,30 @@ class DuneQuery:
             },
         )
 
+    @staticmethod
+    def find_result_page(job_id: str, limit: int, offset: int) -> Post:
+        """
+        Returns json data for a post of type FindResultPageByJob,
+        fetching `limit` result rows of `job_id` starting at `offset`
+        """
+        query = """
+        query FindResultPageByJob($job_id: uuid!, $limit: Int!, $offset: Int!) {
+          get_result_by_job_id(
+            args: {want_job_id: $job_id}, limit: $limit, offset: $offset
+          ) {
+            data
+          }
+        }
+        """
+        return Post(
+            data={
+                "operationName": "FindResultPageByJob",
+                "variables": {"job_id": job_id, "limit": limit, "offset": offset},
+                "query": query,
+            },
+            key_map={"get_result_by_job_id": {"data"}},
+        )
+
     @staticmethod
     def get_queue_position(job_id: str) -> Post:
         """Returns json data for a post of type GetQueuePosition
@@ -652,6 +967,27 @@ class DuneQuery:
             key_map={"data": {"view_queue_positions", "jobs_by_pk"}},
         )
 
+    @staticmethod
+    def get_queue_positions(job_ids: list[str]) -> Post:
+        """Returns json data for a post of type GetJobsStatus
+        Multiplexes the completion check of several jobs into one request:
+        each job is looked up under its own alias `job_<index>`, which is null
+        once the job has completed.
+        """
+        aliases = [f"job_{index}" for index in range(len(job_ids))]
+        arguments = ", ".join(f"${alias}: uuid!" for alias in aliases)
+        lookups = "\n".join(
+            f"  {alias}: jobs_by_pk(id: ${alias}) {{ id }}" for alias in aliases
+        )
+        return Post(
+            data={
+                "operationName": "GetJobsStatus",
+                "variables": dict(zip(aliases, job_ids)),
+                "query": f"query GetJobsStatus({arguments}) {{\n{lookups}\n}}",
+            },
+            key_map={alias: {"id"} for alias in aliases},
+        )
+
 
 def execute_query_post_data(query_id: int, params: list[QueryParameter]) -> Post:
     """Returns json data for a post of type ExecuteQuery"""
@@ -1,7 +1,7 @@
 """Utility methods to support Dune API"""
 import collections
-from datetime import datetime
-from typing import Any, Hashable
+from datetime import datetime, timezone
+from typing import Any, Callable, Collection, Hashable, Optional, Union
 
 DUNE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
@@ -11,19 +11,95 @@ def postgres_date(date_str: str) -> datetime:
     return datetime.strptime(date_str, DUNE_DATE_FORMAT)
 
 
+def from_isoformat(value: str) -> datetime:
+    """
+    datetime.fromisoformat, also accepting a trailing Z and fractions of seconds
+    of any number of digits (e.g. 2022-03-19T07:11:37.34499+00:00, as postgres trims
+    trailing zeros), which Python versions before 3.11 reject.
+    """
+    if value[-1:] == "Z":
+        value = value[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        if value[19:20] != ".":
+            raise
+    end = 20
+    while end < len(value) and value[end].isdigit():
+        end += 1
+    if end == 20:
+        raise ValueError(f"Invalid isoformat string: {value!r}")
+    # Pad (or truncate) the fraction to microseconds
+    fraction = value[20:end].ljust(6, "0")[:6]
+    return datetime.fromisoformat(value[:20] + fraction + value[end:])
+
+
+def parse_datetime(value: str) -> Optional[datetime]:
+    """
+    Parses postgres and ISO format date-time strings
+    (e.g. 2022-03-10 23:50:16 or 2022-03-10T23:50:16.344998+00:00),
+    returning None for strings of any other shape.
+    """
+    # Cheap shape check, rejecting most other strings without attempting to parse.
+    if (
+        not 19 <= len(value) <= 32
+        or value[4] != "-"
+        or value[7] != "-"
+        or value[10] not in " T"
+        or value[13] != ":"
+    ):
+        return None
+    try:
+        return from_isoformat(value)
+    except ValueError:
+        return None
+
+
 def datetime_parser(dct: dict[str, Any]) -> dict[str, Any]:
     """
     Used as object hook in json loads method to parse postgres dates strings
     """
     for key, val in dct.items():
         if isinstance(val, str):
-            try:
-                dct[key] = datetime.strptime(val, DUNE_DATE_FORMAT)
-            except ValueError:
-                pass
+            parsed = parse_datetime(val)
+            if parsed is not None:
+                dct[key] = parsed
     return dct
 
 
+def datetime_parser_for(
+    columns: Collection[str],
+) -> Callable[[dict[str, Any]], dict[str, Any]]:
+    """
+    Returns an object hook (as datetime_parser) which only
+    parses the values of the keys in `columns`
+    """
+    names = frozenset(columns)
+
+    def parser(dct: dict[str, Any]) -> dict[str, Any]:
+        for key in names.intersection(dct):
+            val = dct[key]
+            if isinstance(val, str):
+                parsed = parse_datetime(val)
+                if parsed is not None:
+                    dct[key] = parsed
+        return dct
+
+    return parser
+
+
+def seconds_since(timestamp: Union[str, datetime]) -> float:
+    """
+    Seconds elapsed since `timestamp` (a datetime or ISO format string,
+    e.g. 2022-03-19T07:11:37.344998+00:00). Naive timestamps are taken to be UTC.
+    """
+    if isinstance(timestamp, str):
+        timestamp = from_isoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - timestamp).total_seconds()
+
+
 def open_query(filepath: str) -> str:
     """Opens `filename` and returns as string"""
     with open(filepath, "r", encoding="utf-8") as query_file:
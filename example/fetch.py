@@ -6,10 +6,16 @@ from datetime import datetime
 
 from duneapi.file_io import write_to_csv, File
 from duneapi.api import DuneAPI
+from duneapi.mapper import map_results
 from duneapi.types import Network, QueryParameter, DuneQuery, Address
 from duneapi.util import open_query
 
 
+def parse_time(time_str: str) -> datetime:
+    """Dune timestamps are UTC!"""
+    return datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%S+00:00")
+
+
 @dataclass
 class Record:
     """Arbitrary record with a few different data types"""
@@ -28,8 +34,7 @@ class Record:
             address=Address(obj["miner"]),
             integer=int(obj["number"]),
             decimal=float(obj["tx_fees"]),
-            # Dune timestamps are UTC!
-            time=datetime.strptime(obj["time"], "%Y-%m-%dT%H:%M:%S+00:00"),
+            time=parse_time(obj["time"]),
         )
 
 
@@ -46,7 +51,18 @@ def fetch_records(dune: DuneAPI) -> list[Record]:
         ],
     )
     results = dune.fetch(sample_query)
-    return [Record.from_dict(row) for row in results]
+    # Equivalent to [Record.from_dict(row) for row in results], but compiled once
+    return map_results(
+        Record,
+        results,
+        {
+            "string": "block_hash",
+            "address": ("miner", Address),
+            "integer": ("number", int),
+            "decimal": ("tx_fees", float),
+            "time": ("time", parse_time),
+        },
+    )
 
 
 if __name__ == "__main__":
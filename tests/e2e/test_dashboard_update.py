@@ -15,7 +15,7 @@ class TestDashboard(unittest.TestCase):
         self.assertEqual(dashboard.api.fetch(query2), [{"val": "1337"}])
 
         # Modify the query (by changing the parameter) and update dashboard
-        query2.parameters[0].value = 10
+        query2.parameters[0] = query2.parameters[0].with_value(10)
         dashboard.update()
         self.assertEqual(dashboard.api.fetch(query2), [{"val": "10"}])
 
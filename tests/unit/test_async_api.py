@@ -0,0 +1,158 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock
+from typing import Any
+
+from requests import Response, Session
+
+from duneapi.async_api import AsyncDuneAPI, AsyncTransport
+from duneapi.polling import FixedPolling
+from duneapi.types import DuneQuery, Network
+
+
+def json_response(content: dict[str, Any], status_code: int = 200) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = json.dumps(content).encode()
+    return response
+
+
+class FakeTransport(AsyncTransport):
+    """Local stand-in for dune.xyz: jobs complete after `polls_until_done` polls"""
+
+    def __init__(self, polls_until_done: int = 2):
+        super().__init__(Session())
+        self.polls_until_done = polls_until_done
+        self.polls: dict[str, int] = {}
+        self.operations: list[str] = []
+        self.executions = 0
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> Response:
+        await asyncio.sleep(0)
+        if url.endswith("/api/auth/session"):
+            self.operations.append("session")
+            return json_response({"token": "token"})
+        if not url.endswith("/graphql"):
+            self.operations.append(url)
+            return json_response({})
+        post = json.loads(kwargs["data"])
+        operation = post["operationName"]
+        self.operations.append(operation)
+        if operation == "ExecuteQuery":
+            self.executions += 1
+            job_id = f"job-{self.executions}"
+            return json_response({"data": {"execute_query": {"job_id": job_id}}})
+        job_id = post["variables"]["job_id"]
+        if operation == "GetQueuePosition":
+            self.polls[job_id] = self.polls.get(job_id, 0) + 1
+            done = self.polls[job_id] >= self.polls_until_done
+            return json_response(
+                {
+                    "data": {
+                        "view_queue_positions": [],
+                        "jobs_by_pk": None if done else {"id": job_id},
+                    }
+                }
+            )
+        if operation == "FindResultDataByJob":
+            meta = {
+                "id": "result",
+                "job_id": job_id,
+                "runtime": 1,
+                "generated_at": "2022-03-19T07:11:37.344998+00:00",
+                "columns": ["job"],
+            }
+            return json_response(
+                {
+                    "data": {
+                        "query_results": [meta],
+                        "query_errors": [],
+                        "get_result_by_job_id": [{"data": {"job": job_id}}],
+                    }
+                }
+            )
+        raise ValueError(f"unexpected operation {operation}")
+
+
+class TestAsyncDuneAPI(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.transport = FakeTransport()
+        self.dune = AsyncDuneAPI("user", "password", transport=self.transport)
+        self.dune.polling = FixedPolling(0.01)
+
+    async def test_login(self):
+        await self.dune.login()
+        self.assertEqual(len(self.transport.operations), 3)
+
+    async def test_get_results(self):
+        job_id = await self.dune.execute(1)
+        self.assertEqual(await self.dune.get_results(job_id), [{"job": job_id}])
+        self.assertEqual(
+            self.transport.operations,
+            [
+                "session",
+                "ExecuteQuery",
+                "GetQueuePosition",
+                "GetQueuePosition",
+                "FindResultDataByJob",
+            ],
+        )
+
+    async def test_concurrent_executions(self):
+        queries = [DuneQuery(query_id=i, network=Network.MAINNET) for i in range(100)]
+        results = await asyncio.gather(
+            *[self.dune.execute_and_await_results(q) for q in queries]
+        )
+        self.assertEqual(
+            sorted(r[0]["job"] for r in results),
+            sorted(f"job-{i}" for i in range(1, 101)),
+        )
+        self.assertEqual(self.dune.runtimes[0], 1)
+        # A single token fetch is shared by all concurrent requests
+        self.assertEqual(self.transport.operations.count("session"), 1)
+
+    async def test_rejected_token_renewed_once(self):
+        self.dune.token_manager.set("rejected-token")
+        request = self.transport.request
+
+        async def reject_old_token(method: str, url: str, **kwargs: Any) -> Response:
+            headers = kwargs.get("headers", {})
+            if headers.get("authorization") == "Bearer rejected-token":
+                await asyncio.sleep(0)
+                return json_response({}, status_code=401)
+            return await request(method, url, **kwargs)
+
+        self.transport.request = reject_old_token
+        await asyncio.gather(*[self.dune.execute(i) for i in range(50)])
+        # All polls saw the rejection, but only one replaced the token.
+        self.assertEqual(self.transport.operations.count("session"), 1)
+        self.assertEqual(self.transport.executions, 50)
+
+    async def test_single_relogin(self):
+        failures = iter([RuntimeError("outage")] * 20)
+
+        async def execute_and_await_results(query, timeout=None):
+            failure = next(failures, None)
+            if failure is not None:
+                await asyncio.sleep(0)
+                raise failure
+            return []
+
+        self.dune.initiate_query = AsyncMock()
+        self.dune.execute_and_await_results = execute_and_await_results
+        queries = [DuneQuery(query_id=i, network=Network.MAINNET) for i in range(20)]
+        await asyncio.gather(*[self.dune.fetch(q) for q in queries])
+        # All tasks failed at once, but only one of them logged in again.
+        self.assertEqual(self.transport.operations.count("session"), 1)
+        self.assertEqual(self.dune.auth_generation, 1)
+
+    async def test_timeout(self):
+        self.transport.polls_until_done = 1000
+        job_id = await self.dune.execute(1)
+        with self.assertRaises(TimeoutError):
+            await self.dune.get_results(job_id, timeout=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
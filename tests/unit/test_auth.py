@@ -0,0 +1,181 @@
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from requests import Response, Session
+
+from duneapi.api import DuneAPI
+from duneapi.auth import SessionStore, TokenManager, is_auth_failure
+
+
+def jwt_with_claims(claims: dict) -> str:
+    def encode(obj: dict) -> str:
+        raw = json.dumps(obj).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    return ".".join([encode({"alg": "HS256"}), encode(claims), "signature"])
+
+
+class TestTokenManager(unittest.TestCase):
+    def test_decode_expiry(self):
+        expiry = 1650000000
+        self.assertEqual(
+            TokenManager.decode_expiry(jwt_with_claims({"exp": expiry})), expiry
+        )
+        self.assertIsNone(TokenManager.decode_expiry(jwt_with_claims({"sub": "x"})))
+        self.assertIsNone(TokenManager.decode_expiry("not-a-jwt"))
+        self.assertIsNone(TokenManager.decode_expiry("a.!!!.c"))
+
+    def test_needs_refresh(self):
+        manager = TokenManager(refresh_margin=60)
+        self.assertTrue(manager.needs_refresh())
+
+        manager.set(jwt_with_claims({"exp": time.time() + 3600}))
+        self.assertFalse(manager.needs_refresh())
+
+        manager.set(jwt_with_claims({"exp": time.time() + 30}))
+        self.assertTrue(manager.needs_refresh())
+
+        # Tokens of unknown lifetime are kept until rejected
+        manager.set("opaque-token")
+        self.assertFalse(manager.needs_refresh())
+
+        manager.invalidate()
+        self.assertTrue(manager.needs_refresh())
+
+    def test_is_auth_failure(self):
+        response = Response()
+        response.status_code = 401
+        self.assertTrue(is_auth_failure(response))
+
+        response.status_code = 200
+        response._content = b'{"errors": [{"extensions": {"code": "invalid-jwt"}}]}'
+        self.assertTrue(is_auth_failure(response))
+
+        response._content = b'{"data": {"x": "invalid-jwt"}}'
+        self.assertFalse(is_auth_failure(response))
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SessionStore(os.path.join(self.tmp_dir.name, "session.json"))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        self.assertIsNone(self.store.load("user"))
+
+        session = Session()
+        session.cookies.set("csrf", "abc", domain="dune.xyz", path="/")
+        session.cookies.set(
+            "auth-refresh",
+            "def",
+            domain="dune.xyz",
+            path="/",
+            secure=True,
+            rest={"HttpOnly": None},
+        )
+        self.store.save("user", session, "token")
+
+        stored = self.store.load("user")
+        self.assertEqual(stored["token"], "token")
+        self.assertEqual(
+            {c["name"]: c["value"] for c in stored["cookies"]},
+            {"csrf": "abc", "auth-refresh": "def"},
+        )
+        restored = Session()
+        for cookie in stored["cookies"]:
+            restored.cookies.set(**cookie)
+        refresh = next(c for c in restored.cookies if c.name == "auth-refresh")
+        self.assertTrue(refresh.secure)
+        self.assertTrue(refresh.has_nonstandard_attr("HttpOnly"))
+        # Sessions of other users are never handed out
+        self.assertIsNone(self.store.load("other user"))
+
+        self.store.clear()
+        self.assertIsNone(self.store.load("user"))
+
+    def test_restore_skips_login(self):
+        session = Session()
+        session.cookies.set("auth-refresh", "def", domain="dune.xyz", path="/")
+        self.store.save("user", session, "stored-token")
+
+        dune = DuneAPI("user", "password", session_store=self.store)
+        dune.login = MagicMock()
+        self.assertTrue(dune.restore_session())
+        self.assertEqual(dune.token, "stored-token")
+        self.assertEqual(dune.auth_refresh, "def")
+        dune.login.assert_not_called()
+
+    def test_rejected_session_falls_back_to_login(self):
+        dune = DuneAPI("user", "password", session_store=self.store)
+        dune.fetch_auth_token = MagicMock(
+            side_effect=[RuntimeError("Failed to fetch auth token"), None]
+        )
+        dune.login = MagicMock()
+        dune.refresh_auth_token()
+        dune.login.assert_called_once()
+        self.assertEqual(dune.fetch_auth_token.call_count, 2)
+
+
+class TestSharedClient(unittest.TestCase):
+    """Many threads sharing one DuneAPI"""
+
+    workers = 8
+
+    def setUp(self) -> None:
+        self.dune = DuneAPI("user", "password")
+        self.barrier = threading.Barrier(self.workers)
+
+    def run_concurrently(self, function):
+        def call(_):
+            self.barrier.wait()
+            return function()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            return list(pool.map(call, range(self.workers)))
+
+    def fake_fetch_auth_token(self, token: str):
+        def fetch_auth_token():
+            # Slow enough for all threads to find the token missing
+            time.sleep(0.05)
+            self.dune.token_manager.set(token)
+
+        return MagicMock(side_effect=fetch_auth_token)
+
+    def test_single_token_refresh(self):
+        self.dune.fetch_auth_token = self.fake_fetch_auth_token("fresh-token")
+        tokens = self.run_concurrently(self.dune._valid_token)
+        self.assertEqual(tokens, ["fresh-token"] * self.workers)
+        self.dune.fetch_auth_token.assert_called_once()
+
+    def test_rejected_token_renewed_once(self):
+        self.dune.token_manager.set("rejected-token")
+        self.dune.fetch_auth_token = self.fake_fetch_auth_token("fresh-token")
+        tokens = self.run_concurrently(lambda: self.dune._renew_token("rejected-token"))
+        self.assertEqual(tokens, ["fresh-token"] * self.workers)
+        self.dune.fetch_auth_token.assert_called_once()
+
+    def test_single_relogin(self):
+        self.dune.login = MagicMock(side_effect=lambda: time.sleep(0.05))
+        self.dune.fetch_auth_token = MagicMock()
+        generation = self.dune.auth_generation
+        self.run_concurrently(lambda: self.dune.relogin(generation))
+        self.dune.login.assert_called_once()
+        self.assertEqual(self.dune.auth_generation, generation + 1)
+
+        # Failures after the re-login log in again
+        self.dune.relogin(self.dune.auth_generation)
+        self.assertEqual(self.dune.login.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from duneapi.api import DuneAPI
+from duneapi.cache import ResultCache
+from duneapi.types import DuneQuery, Network, QueryParameter
+
+
+def query(value: int = 1, sql: str = "select 1") -> DuneQuery:
+    return DuneQuery(
+        query_id=1,
+        raw_sql=sql,
+        name="Test",
+        parameters=[QueryParameter.number_type("Number", value)],
+    )
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_result_key(self):
+        self.assertEqual(query().result_key(), query().result_key())
+        renamed = query()
+        renamed.name = "Other"
+        self.assertEqual(query().result_key(), renamed.result_key())
+        self.assertNotEqual(query().result_key(), query(value=2).result_key())
+        self.assertNotEqual(query().result_key(), query(sql="select 2").result_key())
+        polygon = query()
+        polygon.network = Network.POLYGON
+        self.assertNotEqual(query().result_key(), polygon.result_key())
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get(query()))
+        self.cache.put(query(), [{"a": 1}])
+        self.assertEqual(self.cache.get(query()), [{"a": 1}])
+        self.assertIsNone(self.cache.get(query(value=2)))
+        # No temporary files are left behind
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    def test_ttl(self):
+        self.cache.put(query(), [{"a": 1}])
+        self.cache.ttls[1] = 0
+        time.sleep(0.01)
+        self.assertIsNone(self.cache.get(query()))
+        self.cache.ttls[1] = 60
+        self.assertEqual(self.cache.get(query()), [{"a": 1}])
+
+    def test_lru_eviction(self):
+        for value in range(3):
+            self.cache.put(query(value), [{"a": value}])
+            path = self.cache._path(query(value))
+            os.utime(path, (value, value))
+        # Using the oldest entry makes it the most recently used.
+        self.cache.get(query(0))
+        self.cache.max_bytes = sum(
+            os.path.getsize(self.cache._path(query(value))) for value in [0, 2]
+        )
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.get(query(0)))
+        self.assertIsNone(self.cache.get(query(1)))
+        self.assertIsNotNone(self.cache.get(query(2)))
+
+    def test_unreadable_entry(self):
+        os.makedirs(self.directory.name, exist_ok=True)
+        with open(self.cache._path(query()), "w", encoding="utf-8") as entry:
+            entry.write("{")
+        self.assertIsNone(self.cache.get(query()))
+
+    def test_clear(self):
+        self.cache.put(query(), [{"a": 1}])
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(query()))
+
+    def test_fetch_uses_cache(self):
+        dune = DuneAPI("user", "password")
+        dune.result_cache = self.cache
+        dune.initiate_query = MagicMock()
+        dune.execute_and_await_results = MagicMock(return_value=[{"a": 1}])
+
+        self.assertEqual(dune.fetch(query()), [{"a": 1}])
+        self.assertEqual(dune.fetch(query()), [{"a": 1}])
+        self.assertEqual(dune.execute_and_await_results.call_count, 1)
+        dune.fetch(query(), force_refresh=True)
+        self.assertEqual(dune.execute_and_await_results.call_count, 2)
+        self.assertEqual(dune.initiate_query.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from duneapi import codec
+from duneapi.util import datetime_parser
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self) -> None:
+        self.selected = codec.get_codec()
+        self.payload = {
+            "data": {
+                "get_result_by_job_id": [
+                    {"data": {"number": 1, "text": "ünïcode", "time": None}},
+                    {"data": {"time": "2022-03-10 23:50:16", "value": 0.5}},
+                ]
+            }
+        }
+
+    def tearDown(self) -> None:
+        codec.set_codec(self.selected.name)
+
+    def test_stdlib_always_available(self):
+        self.assertIn("json", codec.CODECS)
+        with self.assertRaises(ValueError):
+            codec.set_codec("no-such-codec")
+
+    def test_codecs_agree_with_stdlib(self):
+        body = json.dumps(self.payload).encode()
+        for name in codec.CODECS:
+            codec.set_codec(name)
+            self.assertEqual(codec.get_codec().name, name)
+            self.assertEqual(codec.loads(body), self.payload, name)
+            self.assertEqual(codec.loads(body.decode()), self.payload, name)
+            self.assertEqual(json.loads(codec.dumps(self.payload)), self.payload, name)
+            self.assertEqual(
+                codec.loads(body, object_hook=datetime_parser),
+                json.loads(body, object_hook=datetime_parser),
+                name,
+            )
+
+    def test_large_integers(self):
+        large = {"value": 2**70}
+        for name in codec.CODECS:
+            codec.set_codec(name)
+            self.assertEqual(codec.loads(json.dumps(large)), large, name)
+            self.assertEqual(json.loads(codec.dumps(large)), large, name)
+
+    def test_invalid_json(self):
+        for name in codec.CODECS:
+            codec.set_codec(name)
+            with self.assertRaises(ValueError):
+                codec.loads(b'{"data": ')
+
+
+if __name__ == "__main__":
+    unittest.main()
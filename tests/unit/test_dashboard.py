@@ -1,11 +1,23 @@
 import json
+import os
+import tempfile
 import unittest
+from unittest.mock import MagicMock, patch
+
+from requests import Response
 
 from duneapi.api import DuneAPI
-from duneapi.dashboard import DuneDashboard
+from duneapi.dashboard import DuneDashboard, load_manifest
 from duneapi.types import DashboardTile, DuneQuery
 
 
+def json_response(content: dict) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps(content).encode()
+    return response
+
+
 class MyTestCase(unittest.TestCase):
     def setUp(self) -> None:
         self.user = "TestUser"
@@ -100,6 +112,138 @@ class MyTestCase(unittest.TestCase):
             ],
         )
 
+    @patch("duneapi.dashboard.time.sleep")
+    def test_concurrent_update(self, sleep):
+        dashboard = DuneDashboard.from_json(self.dune, self.valid_input)
+        self.dune.initiate_query = MagicMock(return_value=True)
+        flaky_attempts = iter([RuntimeError("flaky"), "job-2"])
+
+        def execute(query_id, parameters):
+            if query_id == 2:
+                result = next(flaky_attempts)
+                if isinstance(result, Exception):
+                    raise result
+                return result
+            return f"job-{query_id}"
+
+        self.dune.execute = MagicMock(side_effect=execute)
+        reports = dashboard.update(max_workers=2)
+        self.assertEqual([r.job_id for r in reports], ["job-1", "job-2"])
+        self.assertEqual([r.retries for r in reports], [0, 1])
+        self.assertEqual([r.error for r in reports], [None, None])
+        sleep.assert_called_once_with(2)
+
+    @patch("duneapi.dashboard.time.sleep")
+    def test_update_failure_report(self, _sleep):
+        dashboard = DuneDashboard.from_json(self.dune, self.valid_input)
+        self.dune.initiate_query = MagicMock(return_value=True)
+        self.dune.execute = MagicMock(side_effect=RuntimeError("down"))
+
+        reports = dashboard.update(max_workers=2, max_retries=1, strict=False)
+        self.assertEqual([r.error for r in reports], ["down", "down"])
+        self.assertEqual([r.retries for r in reports], [1, 1])
+
+        with self.assertRaises(SystemExit):
+            dashboard.update(max_workers=2, max_retries=0)
+
+    def test_incremental_update(self):
+        dashboard = DuneDashboard.from_json(self.dune, self.valid_input)
+        self.dune.initiate_query = MagicMock(return_value=True)
+        self.dune.execute = MagicMock(return_value="job")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manifest = os.path.join(tmp_dir, "manifest.json")
+            reports = dashboard.update(manifest=manifest)
+            self.assertEqual([r.upserted for r in reports], [True, True])
+            self.assertEqual(self.dune.initiate_query.call_count, 2)
+
+            # Nothing changed: queries are executed but not upserted.
+            reports = dashboard.update(manifest=manifest)
+            self.assertEqual([r.upserted for r in reports], [False, False])
+            self.assertEqual(self.dune.initiate_query.call_count, 2)
+            self.assertEqual(self.dune.execute.call_count, 4)
+
+            dashboard.queries[1].description = "changed"
+            reports = dashboard.update(manifest=manifest)
+            self.assertEqual([r.upserted for r in reports], [False, True])
+            self.assertEqual(self.dune.initiate_query.call_count, 3)
+            # Written atomically, leaving no temporary files behind
+            self.assertEqual(os.listdir(tmp_dir), ["manifest.json"])
+
+            # A truncated manifest is ignored: all queries are upserted again.
+            with open(manifest, "w", encoding="utf-8") as manifest_file:
+                manifest_file.write('{"1": "abc')
+            self.assertEqual(load_manifest(manifest), {})
+            reports = dashboard.update(manifest=manifest)
+            self.assertEqual([r.upserted for r in reports], [True, True])
+
+    def test_from_dune_batches_query_lookups(self):
+        def widget(query_id: int) -> dict:
+            return {"visualization": {"query_details": {"query_id": query_id}}}
+
+        def query_doc(query_id: int) -> dict:
+            return {
+                "id": query_id,
+                "name": f"Query {query_id}",
+                "description": "",
+                "query": f"select {query_id}",
+                "dataset_id": 4,
+                "parameters": [],
+                "user": {"name": self.user},
+            }
+
+        dashboard_response = MagicMock()
+        dashboard_response.json.return_value = {
+            "data": {
+                "dashboards": [
+                    {
+                        "name": "Demo Dashboard",
+                        "user": {"name": self.user},
+                        "visualization_widgets": [widget(i % 3) for i in range(60)],
+                    }
+                ]
+            }
+        }
+        queries_response = json_response(
+            {"data": {"queries": [query_doc(i) for i in range(3)]}}
+        )
+        self.dune.post_dune_request = MagicMock(
+            side_effect=[dashboard_response, queries_response]
+        )
+
+        dashboard = DuneDashboard.from_dune(self.dune, "Demo-Dashboard", False)
+        self.assertEqual(len(dashboard.queries), 3)
+        self.assertEqual(self.dune.post_dune_request.call_count, 2)
+        find_queries = self.dune.post_dune_request.call_args.args[0]
+        self.assertEqual(find_queries.data["variables"]["ids"], [0, 1, 2])
+
+    def test_find_queries_chunks(self):
+        def find_queries(post):
+            ids = post.data["variables"]["ids"]
+            return json_response({"data": {"queries": [{"id": i} for i in ids]}})
+
+        self.dune.post_dune_request = MagicMock(side_effect=find_queries)
+        DuneDashboard.find_queries(self.dune, list(range(5)), chunk_size=2)
+        self.assertEqual(
+            [
+                c.args[0].data["variables"]["ids"]
+                for c in self.dune.post_dune_request.call_args_list
+            ],
+            [[0, 1], [2, 3], [4]],
+        )
+
+    def test_find_queries_validated(self):
+        self.dune.post_dune_request = MagicMock(
+            return_value=json_response({"data": {"queries": [{"id": 1}]}})
+        )
+        with self.assertRaises(ValueError):
+            DuneDashboard.find_queries(self.dune, [1, 2])
+
+        self.dune.post_dune_request = MagicMock(
+            return_value=json_response({"errors": [{"message": "not allowed"}]})
+        )
+        with self.assertRaises(RuntimeError):
+            DuneDashboard.find_queries(self.dune, [1])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+
+from duneapi.decode import ColumnType, decode_column, decode_columns
+from duneapi.types import ColumnarResults
+
+
+class TestDecodeColumn(unittest.TestCase):
+    def test_int(self):
+        column = decode_column(["1", None, 3], ColumnType.INT)
+        self.assertEqual(column.values.dtype, np.int64)
+        self.assertEqual(column.values[[0, 2]].tolist(), [1, 3])
+        self.assertEqual(column.mask.tolist(), [False, True, False])
+
+    def test_float(self):
+        column = decode_column(["0.14785533", "1e3"], "float")
+        self.assertEqual(column.values.dtype, np.float64)
+        self.assertEqual(column.values.tolist(), [0.14785533, 1000.0])
+
+    def test_decimal(self):
+        column = decode_column(["1.10", None], ColumnType.DECIMAL)
+        self.assertEqual(column.values[0], Decimal("1.10"))
+        self.assertEqual(column.mask.tolist(), [False, True])
+
+    def test_timestamp(self):
+        column = decode_column(
+            ["2022-03-10T23:50:16+00:00", "2022-03-10T23:50:16.5+00:00", None],
+            ColumnType.TIMESTAMP,
+        )
+        self.assertEqual(column.values.dtype, np.dtype("datetime64[us]"))
+        self.assertEqual(
+            column.values[:2].tolist()[1].isoformat(), "2022-03-10T23:50:16.500000"
+        )
+        self.assertTrue(np.isnat(column.values[2]))
+
+    def test_bool(self):
+        column = decode_column(["true", "false", True, None], ColumnType.BOOL)
+        self.assertEqual(column.values.tolist(), [True, False, True, False])
+        self.assertEqual(column.mask.tolist(), [False, False, False, True])
+        self.assertEqual(
+            decode_column(["T", "f", "1", "0"], ColumnType.BOOL).values.tolist(),
+            [True, False, True, False],
+        )
+        for invalid in ["yes", "f00"]:
+            with self.assertRaises(ValueError):
+                decode_column(["true", invalid], ColumnType.BOOL)
+
+    def test_address(self):
+        column = decode_column(
+            ["\\x5d4020b9261f01b6f8a45db929704b0ad6f5e9e6", None], ColumnType.ADDRESS
+        )
+        self.assertEqual(column.values.dtype, np.dtype("S20"))
+        self.assertEqual(
+            column.values[0], bytes.fromhex("5d4020b9261f01b6f8a45db929704b0ad6f5e9e6")
+        )
+        self.assertEqual(column.mask.tolist(), [False, True])
+        self.assertEqual(
+            decode_column(
+                ["0X5D4020B9261F01B6F8A45DB929704B0AD6F5E9E6"], ColumnType.ADDRESS
+            ).values[0],
+            bytes.fromhex("5d4020b9261f01b6f8a45db929704b0ad6f5e9e6"),
+        )
+        with self.assertRaises(ValueError):
+            decode_column(["0x12"], ColumnType.ADDRESS)
+
+    def test_text(self):
+        column = decode_column(["a", None], ColumnType.TEXT)
+        self.assertEqual(column.values.tolist(), ["a", None])
+        self.assertEqual(column.mask.tolist(), [False, True])
+
+    def test_empty_columns(self):
+        for column_type in ColumnType:
+            column = decode_column([], column_type)
+            self.assertEqual(len(column.values), 0, column_type)
+            self.assertEqual(len(column.mask), 0, column_type)
+        self.assertEqual(decode_column([], ColumnType.ADDRESS).values.dtype, "S20")
+
+    def test_decode_columns(self):
+        results = ColumnarResults(["number", "hash"], [["1", "2"], ["0x1", "0x2"]])
+        decoded = decode_columns(results, {"number": ColumnType.INT})
+        self.assertEqual(list(decoded), ["number"])
+        self.assertEqual(len(decoded["number"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,13 @@
+import json
 import unittest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, Mock
 
-from duneapi.api import DuneAPI
-from duneapi.types import DuneQuery, Network
+from requests import Response
+
+from duneapi.api import PAGE_ATTEMPTS, DuneAPI
+from duneapi.response import DuneResponse
+from duneapi.types import DuneQuery, Network, Post
 
 
 class TestDuneAnalytics(unittest.TestCase):
@@ -32,6 +37,153 @@ class TestDuneAnalytics(unittest.TestCase):
         with self.assertRaises(Exception):
             self.dune.fetch(self.query)
 
+    def test_token_cached_between_posts(self):
+        token_response = Response()
+        token_response.status_code = 200
+        token_response.json = MagicMock(return_value={"token": "opaque-token"})
+        graph_response = Response()
+        graph_response.status_code = 200
+        graph_response._content = b'{"data": {}}'
+
+        self.dune.session.post = MagicMock(
+            side_effect=lambda url, **kwargs: token_response
+            if url.endswith("/api/auth/session")
+            else graph_response
+        )
+        post = Post(data={}, key_map={})
+        self.dune.post_dune_request(post)
+        self.dune.post_dune_request(post)
+        # One token fetch, followed by two graph posts.
+        self.assertEqual(self.dune.session.post.call_count, 3)
+
+    def test_missing_token(self):
+        token_response = Response()
+        token_response.status_code = 200
+        token_response._content = b'{"user": null}'
+        self.dune.session.post = MagicMock(return_value=token_response)
+        with self.assertRaises(RuntimeError):
+            self.dune.fetch_auth_token()
+        self.assertIsNone(self.dune.token)
+
+    def test_token_refreshed_on_rejection(self):
+        token_response = Response()
+        token_response.status_code = 200
+        token_response.json = MagicMock(return_value={"token": "opaque-token"})
+        rejected = Response()
+        rejected.status_code = 401
+        rejected._content = b"{}"
+        accepted = Response()
+        accepted.status_code = 200
+        accepted._content = b'{"data": {}}'
+
+        graph_responses = iter([rejected, accepted])
+        self.dune.session.post = MagicMock(
+            side_effect=lambda url, **kwargs: token_response
+            if url.endswith("/api/auth/session")
+            else next(graph_responses)
+        )
+        response = self.dune.post_dune_request(Post(data={}, key_map={}))
+        self.assertEqual(response.response, accepted)
+        # Two token fetches and two graph posts.
+        self.assertEqual(self.dune.session.post.call_count, 4)
+
+    def test_paginated_results(self):
+        rows = [{"data": {"number": i}} for i in range(23)]
+        meta = {
+            "id": "result",
+            "job_id": "job",
+            "runtime": 1,
+            "generated_at": "2022-03-19T07:11:37.344998+00:00",
+            "columns": ["number"],
+        }
+        failures = {10: 1}
+
+        def post_dune_request(post):
+            variables = post.data["variables"]
+            offset = variables.get("offset", 0)
+            if failures.get(offset):
+                failures[offset] -= 1
+                raise RuntimeError("page failed")
+            data = {"get_result_by_job_id": rows[offset : offset + variables["limit"]]}
+            if post.data["operationName"] == "FindResultDataByJob":
+                data.update({"query_results": [meta], "query_errors": []})
+            response = Response()
+            response.status_code = 200
+            response._content = json.dumps({"data": data}).encode()
+            return DuneResponse(response)
+
+        self.dune.post_dune_request = MagicMock(side_effect=post_dune_request)
+        results = self.dune.fetch_query_results_paginated(
+            "job", page_size=5, max_workers=2
+        )
+        self.assertEqual(results.data, [row["data"] for row in rows])
+        self.assertEqual(results.meta.runtime, 1)
+        # Five pages (the last one short), plus one retry
+        self.assertEqual(self.dune.post_dune_request.call_count, 6)
+
+        failures[5] = PAGE_ATTEMPTS
+        with self.assertRaises(RuntimeError):
+            self.dune.fetch_query_results_paginated("job", page_size=5)
+
+    def test_reuse_recent_results(self):
+        generated_at = datetime.now(timezone.utc) - timedelta(minutes=10)
+        latest = {"job_id": "job", "result_id": "result", "error_id": None}
+        saved = {
+            "query": self.query.raw_sql,
+            "dataset_id": self.query.network.value,
+            # Postgres trims trailing zeros of fractional seconds
+            "updated_at": "2022-03-19T07:11:37.34499+00:00",
+        }
+
+        def post_dune_request(post):
+            if post.data["operationName"] == "GetResult":
+                data = {"get_result_v2": latest, "queries": [saved]}
+            else:
+                meta = {
+                    "id": "result",
+                    "job_id": "job",
+                    "runtime": 1,
+                    "generated_at": generated_at.isoformat(),
+                    "columns": ["number"],
+                }
+                data = {
+                    "query_results": [meta],
+                    "query_errors": [],
+                    "get_result_by_job_id": [{"data": {"number": 1}}],
+                }
+            response = Response()
+            response.status_code = 200
+            response._content = json.dumps({"data": data}).encode()
+            return DuneResponse(response)
+
+        self.dune.post_dune_request = MagicMock(side_effect=post_dune_request)
+        self.dune.initiate_query = MagicMock()
+        self.dune.execute = MagicMock()
+        self.assertEqual(self.dune.find_recent_job(self.query, max_age=3600), "job")
+        self.assertIsNone(self.dune.find_recent_job(self.query, max_age=60))
+
+        self.assertEqual(self.dune.fetch(self.query, max_age=3600), [{"number": 1}])
+        self.dune.initiate_query.assert_not_called()
+        self.dune.execute.assert_not_called()
+
+        # Results of SQL other than the local one are never reused.
+        changed = DuneQuery(
+            raw_sql="select 'NEW SQL'",
+            description="",
+            network=Network.MAINNET,
+            query_id=0,
+            parameters=[],
+            name="Test",
+        )
+        self.assertIsNone(self.dune.find_recent_job(changed, max_age=3600))
+        # Nor are results generated before the saved query was last updated.
+        saved["updated_at"] = datetime.now(timezone.utc).isoformat()
+        self.assertIsNone(self.dune.find_recent_job(self.query, max_age=3600))
+
+        saved["updated_at"] = "2022-03-19T07:11:37.34499+00:00"
+        latest.update({"result_id": None, "error_id": "error"})
+        self.assertIsNone(self.dune.find_recent_job(self.query, max_age=3600))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+import unittest
+
+# Modules too slow to import for short-lived scripts, which only need them late (if ever)
+HEAVY_MODULES = ["web3", "eth_account", "eth_abi", "numpy"]
+
+
+class TestImportBudget(unittest.TestCase):
+    def test_api_import_is_light(self):
+        # A fresh interpreter, since other tests have imported everything already.
+        imported = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, duneapi.api; print(' '.join(sys.modules))",
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split()
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+
+    def test_address_imports_web3_when_used(self):
+        # Log lines may precede the printed values
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; from duneapi.types import Address; "
+                "print(Address.from_int(1), 'web3' in sys.modules)",
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split()[-2:]
+        self.assertEqual(output, ["0x0000000000000000000000000000000000000001", "True"])
+
+
+if __name__ == "__main__":
+    unittest.main()
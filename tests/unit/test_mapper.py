@@ -0,0 +1,119 @@
+import sys
+import unittest
+from dataclasses import dataclass, field
+
+from duneapi.mapper import MAPPER_CACHE_SIZE, _cached_mapper, map_results, record_mapper
+from duneapi.types import Address, ColumnarResults
+
+
+@dataclass
+class Block:
+    number: int
+    miner: Address
+    hash: str = ""
+
+
+@dataclass
+class SlottedBlock:
+    __slots__ = ("number", "hash")
+    number: int
+    hash: str
+
+
+class PlainBlock:
+    number: int
+
+
+@dataclass
+class Labelled:
+    label: str
+    tags: list[str] = field(default_factory=list)
+
+
+class TestRecordMapper(unittest.TestCase):
+    def setUp(self) -> None:
+        self.miner = "0xde1c59bc25d806ad9ddcbe246c4b5e5505645718"
+        self.rows = [
+            {"block_number": "1", "block_miner": self.miner, "block_hash": "0x1"},
+            {"block_number": "2", "block_miner": self.miner, "block_hash": "0x2"},
+        ]
+        self.mapping = {
+            "number": ("block_number", int),
+            "miner": ("block_miner", Address),
+            "hash": "block_hash",
+        }
+
+    def test_map_dict_rows(self):
+        self.assertEqual(
+            map_results(Block, self.rows, self.mapping),
+            [
+                Block(1, Address(self.miner), "0x1"),
+                Block(2, Address(self.miner), "0x2"),
+            ],
+        )
+
+    def test_map_columnar_rows(self):
+        columns = ["block_hash", "block_number", "block_miner"]
+        results = ColumnarResults(
+            columns, [[row[c] for row in self.rows] for c in columns]
+        )
+        self.assertEqual(
+            map_results(Block, results, self.mapping),
+            map_results(Block, self.rows, self.mapping),
+        )
+
+    def test_partial_mapping_uses_defaults(self):
+        mapping = {"label": "block_hash"}
+        self.assertEqual(
+            map_results(Labelled, self.rows, mapping),
+            [Labelled("0x1"), Labelled("0x2")],
+        )
+
+    def test_slotted_dataclass(self):
+        mapping = {"hash": "block_hash", "number": ("block_number", int)}
+        blocks = map_results(SlottedBlock, self.rows, mapping)
+        self.assertEqual(blocks, [SlottedBlock(1, "0x1"), SlottedBlock(2, "0x2")])
+        self.assertFalse(hasattr(blocks[0], "__dict__"))
+
+    def test_cached(self):
+        self.assertIs(
+            record_mapper(Block, self.mapping), record_mapper(Block, self.mapping)
+        )
+
+    @unittest.skipIf(sys.version_info < (3, 10), "kw_only requires Python 3.10")
+    def test_keyword_only_fields(self):
+        @dataclass(kw_only=True)
+        class KeywordBlock:
+            number: int
+            hash: str
+
+        @dataclass
+        class MixedBlock:
+            number: int
+            hash: str = field(kw_only=True)
+
+        mapping = {"number": ("block_number", int), "hash": "block_hash"}
+        self.assertEqual(
+            map_results(KeywordBlock, self.rows[:1], mapping),
+            [KeywordBlock(number=1, hash="0x1")],
+        )
+        self.assertEqual(
+            map_results(MixedBlock, self.rows[:1], mapping),
+            [MixedBlock(1, hash="0x1")],
+        )
+
+    def test_cache_bounded(self):
+        for _ in range(MAPPER_CACHE_SIZE + 10):
+            # Every inline lambda is a new converter, hence a new mapper.
+            map_results(Labelled, self.rows, {"label": ("block_hash", lambda v: v)})
+        self.assertLessEqual(_cached_mapper.cache_info().currsize, MAPPER_CACHE_SIZE)
+
+    def test_invalid_mapping(self):
+        with self.assertRaises(AssertionError):
+            record_mapper(Block, {"unknown": "block_hash"})
+        with self.assertRaises(AssertionError):
+            record_mapper(PlainBlock, {"number": "block_number"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import itertools
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from requests import Response
+
+from duneapi.api import DuneAPI
+from duneapi.polling import (
+    BackoffPolling,
+    FixedPolling,
+    PollingStrategy,
+    client_polling,
+    poll_until,
+)
+from duneapi.response import DuneResponse
+
+
+def take(iterator, count):
+    return list(itertools.islice(iterator, count))
+
+
+def queue_response(completed: bool) -> DuneResponse:
+    response = Response()
+    response.status_code = 200
+    jobs_by_pk = None if completed else {"id": "job"}
+    response._content = json.dumps(
+        {"data": {"view_queue_positions": [], "jobs_by_pk": jobs_by_pk}}
+    ).encode()
+    return DuneResponse(response)
+
+
+class TestPollingStrategies(unittest.TestCase):
+    def test_fixed(self):
+        self.assertEqual(take(FixedPolling(5).intervals(), 3), [5, 5, 5])
+
+    def test_backoff(self):
+        polling = BackoffPolling(initial=0.5, factor=2, maximum=3, jitter=0)
+        self.assertEqual(take(polling.intervals(), 5), [0.5, 1, 2, 3, 3])
+
+    def test_backoff_seeded_by_runtime(self):
+        polling = BackoffPolling(initial=0.5, factor=2, maximum=30, jitter=0)
+        self.assertEqual(take(polling.intervals(10), 3), [8, 0.5, 1])
+        # The seed is not bounded by the maximum interval
+        self.assertEqual(take(polling.intervals(100), 2), [80, 0.5])
+
+    def test_client_polling(self):
+        self.assertIsInstance(client_polling(5), BackoffPolling)
+        self.assertEqual(take(client_polling(0).intervals(), 2), [0, 0])
+        DuneAPI("user", "password", ping_frequency=0)
+
+    def test_abstract_base(self):
+        with self.assertRaises(TypeError):
+            PollingStrategy()
+
+    def test_jitter_bounds(self):
+        polling = BackoffPolling(initial=1, factor=1, maximum=1, jitter=0.2)
+        for interval in take(polling.intervals(), 50):
+            self.assertTrue(0.8 <= interval <= 1.2)
+
+
+class TestWaitForJob(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dune = DuneAPI("user", "password")
+        self.dune.polling = FixedPolling(1)
+
+    @patch("duneapi.polling.time.sleep")
+    def test_waits_until_complete(self, sleep):
+        self.dune.post_dune_request = MagicMock(
+            side_effect=[queue_response(False), queue_response(False)]
+            + [queue_response(True)]
+        )
+        self.dune.wait_for_job("job")
+        self.assertEqual(self.dune.post_dune_request.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    @patch("duneapi.polling.time.sleep")
+    def test_finite_intervals(self, sleep):
+        done = MagicMock(side_effect=[False, False, False])
+        with self.assertRaises(TimeoutError):
+            poll_until(done, iter([1, 1]))
+        self.assertEqual(done.call_count, 3)
+
+        done = MagicMock(side_effect=[False, True])
+        poll_until(done, iter([1]))
+
+    @patch("duneapi.polling.time.sleep")
+    @patch("duneapi.polling.time.monotonic")
+    def test_timeout(self, monotonic, sleep):
+        monotonic.side_effect = itertools.count(start=0, step=1)
+        self.dune.post_dune_request = MagicMock(return_value=queue_response(False))
+        with self.assertRaises(TimeoutError) as err:
+            self.dune.wait_for_job("job", timeout=3)
+        self.assertEqual(
+            str(err.exception), "Job job did not complete within 3 seconds"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
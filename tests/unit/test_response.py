@@ -1,9 +1,12 @@
+import json
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import patch
 
 from requests import Response
 
+from duneapi import codec
 from duneapi.response import (
+    DuneResponse,
     pre_validate_response,
     validate_and_parse_dict_response,
     validate_and_parse_list_response,
@@ -19,7 +22,7 @@ class TestOperations(unittest.TestCase):
 
     def test_pre_validation_success(self):
         self.response.status_code = 200
-        self.response.json = MagicMock(return_value=self.valid_dict_data)
+        self.response._content = json.dumps(self.valid_dict_data).encode()
         response_data = pre_validate_response(self.response, key_map=self.key_map)
         self.assertEqual(response_data, self.valid_dict_data["data"])
 
@@ -32,19 +35,19 @@ class TestOperations(unittest.TestCase):
         )
 
         self.response.status_code = 200
-        self.response.json = MagicMock(return_value={"x": {"y": "z"}})
+        self.response._content = json.dumps({"x": {"y": "z"}}).encode()
         with self.assertRaises(ValueError) as err:
             pre_validate_response(self.response, key_map={"x": {"y"}})
         self.assertEqual(
             str(err.exception), "response json {'x': {'y': 'z'}} missing 'data' key"
         )
 
-        self.response.json = MagicMock(return_value={"data": {"query_errors": 5}})
+        self.response._content = json.dumps({"data": {"query_errors": 5}}).encode()
         with self.assertRaises(RuntimeError) as err:
             pre_validate_response(self.response, {"x": {"y"}})
         self.assertEqual(str(err.exception), "Dune API Request failed with errors 5")
 
-        self.response.json = MagicMock(return_value=self.valid_dict_data)
+        self.response._content = json.dumps(self.valid_dict_data).encode()
         with self.assertRaises(AssertionError) as err:
             pre_validate_response(self.response, key_map={"wrong key": {"y"}})
         self.assertEqual(
@@ -54,7 +57,7 @@ class TestOperations(unittest.TestCase):
 
     def test_dict_validation_success(self):
         self.response.status_code = 200
-        self.response.json = MagicMock(return_value=self.valid_dict_data)
+        self.response._content = json.dumps(self.valid_dict_data).encode()
         response_data = validate_and_parse_dict_response(
             self.response, key_map=self.key_map
         )
@@ -62,7 +65,7 @@ class TestOperations(unittest.TestCase):
 
     def test_list_validation_success(self):
         self.response.status_code = 200
-        self.response.json = MagicMock(return_value=self.valid_list_data)
+        self.response._content = json.dumps(self.valid_list_data).encode()
         response_data = validate_and_parse_list_response(
             self.response, key_map=self.key_map
         )
@@ -71,13 +74,13 @@ class TestOperations(unittest.TestCase):
     def test_dict_validation_error(self):
         self.response.status_code = 200
         # Note that valid list data is not valid dict data
-        self.response.json = MagicMock(return_value=self.valid_list_data)
+        self.response._content = json.dumps(self.valid_list_data).encode()
         with self.assertRaises(AssertionError) as err:
             validate_and_parse_dict_response(self.response, key_map=self.key_map)
         self.assertEqual(str(err.exception), "Invalid response type <class 'list'>")
 
         partially_valid_dict_data = {"data": {"x": {"a": "b"}}}
-        self.response.json = MagicMock(return_value=partially_valid_dict_data)
+        self.response._content = json.dumps(partially_valid_dict_data).encode()
         with self.assertRaises(AssertionError) as err:
             validate_and_parse_dict_response(self.response, key_map=self.key_map)
         self.assertEqual(str(err.exception), "Fail dict_keys(['a']) != {'y'}")
@@ -85,17 +88,32 @@ class TestOperations(unittest.TestCase):
     def test_list_validation_error(self):
         self.response.status_code = 200
         # Note that valid dict data is not valid list data
-        self.response.json = MagicMock(return_value=self.valid_dict_data)
+        self.response._content = json.dumps(self.valid_dict_data).encode()
         with self.assertRaises(AssertionError) as err:
             validate_and_parse_list_response(self.response, key_map=self.key_map)
         self.assertEqual(str(err.exception), "Invalid response type <class 'dict'>")
 
         partially_valid_list_data = {"data": {"x": [{"a": "b"}]}}
-        self.response.json = MagicMock(return_value=partially_valid_list_data)
+        self.response._content = json.dumps(partially_valid_list_data).encode()
         with self.assertRaises(AssertionError) as err:
             validate_and_parse_list_response(self.response, key_map=self.key_map)
         self.assertEqual(str(err.exception), "Fail dict_keys(['a']) != {'y'}")
 
+    def test_single_decode(self):
+        self.response.status_code = 200
+        self.response._content = json.dumps(self.valid_dict_data).encode()
+        dune_response = DuneResponse(self.response)
+        self.assertIs(DuneResponse.wrap(dune_response), dune_response)
+
+        with patch("duneapi.codec.loads", wraps=codec.loads) as loads:
+            response_data = validate_and_parse_dict_response(
+                dune_response, key_map=self.key_map
+            )
+            self.assertEqual(response_data, self.valid_dict_data["data"])
+            self.assertEqual(dune_response.data, self.valid_dict_data["data"])
+            self.assertEqual(dune_response.json(), self.valid_dict_data)
+        loads.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
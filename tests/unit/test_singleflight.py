@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from duneapi.api import DuneAPI
+from duneapi.singleflight import AsyncSingleFlight, SingleFlight
+from duneapi.types import DuneQuery, QueryParameter
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_coalesced(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(timeout=5)
+            return ["result"]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(flight.call, "key", slow) for _ in range(4)]
+            while len(flight._calls) == 0:
+                pass
+            futures.append(executor.submit(flight.call, "other", lambda: ["other"]))
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(results[:4], [["result"]] * 4)
+        # All callers share the very same result
+        self.assertTrue(all(result is results[0] for result in results[:4]))
+        self.assertEqual(results[4], ["other"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight._calls, {})
+        # Completed calls are not reused
+        self.assertEqual(flight.call("key", lambda: ["again"]), ["again"])
+
+    def test_exception_shared(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def failing():
+            release.wait(timeout=5)
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(flight.call, "key", failing)
+            while "key" not in flight._calls:
+                pass
+            second = executor.submit(flight.call, "key", failing)
+            release.set()
+            for future in [first, second]:
+                with self.assertRaises(RuntimeError):
+                    future.result()
+        self.assertEqual(flight._calls, {})
+
+    def test_dune_executions_coalesced(self):
+        dune = DuneAPI("user", "password")
+        release = threading.Event()
+        executions = []
+
+        def execute(query, timeout, max_age):
+            executions.append(query.query_id)
+            release.wait(timeout=5)
+            return [{"id": query.query_id}]
+
+        dune._execute_and_await = MagicMock(side_effect=execute)
+
+        def query(value: int) -> DuneQuery:
+            parameters = [QueryParameter.number_type("Number", value)]
+            return DuneQuery(query_id=1, raw_sql="select 1", parameters=parameters)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            first = executor.submit(dune.execute_and_await_results, query(1))
+            while not executions:
+                pass
+            same = executor.submit(dune.execute_and_await_results, query(1))
+            other = executor.submit(dune.execute_and_await_results, query(2))
+            # Reusing recent results is no substitute for a fresh execution
+            reused = executor.submit(
+                dune.execute_and_await_results, query(1), max_age=3600
+            )
+            while len(executions) < 3:
+                pass
+            release.set()
+            self.assertIs(first.result(), same.result())
+            self.assertIsNot(first.result(), reused.result())
+            other.result()
+        self.assertEqual(executions, [1, 1, 1])
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_coalesced(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return ["result"]
+
+        results = await asyncio.gather(*[flight.call("key", slow) for _ in range(5)])
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight._calls, {})
+
+    async def test_cancelled_caller(self):
+        flight = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.01)
+            return 1
+
+        first = asyncio.ensure_future(flight.call("key", slow))
+        second = asyncio.ensure_future(flight.call("key", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
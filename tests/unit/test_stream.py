@@ -0,0 +1,140 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from requests import Response
+
+from duneapi.api import DuneAPI
+from duneapi.response import DuneResponse
+from duneapi.stream import ResultStream, batched
+from duneapi.types import Post
+
+
+def result_body(rows, query_errors=None) -> bytes:
+    meta = {
+        "id": "result",
+        "job_id": "job",
+        "runtime": 3,
+        "generated_at": "2022-03-19T07:11:37.344998+00:00",
+        "columns": ["number", "text"],
+        "__typename": "query_results",
+    }
+    return json.dumps(
+        {
+            "data": {
+                "query_results": [] if query_errors else [meta],
+                "query_errors": query_errors or [],
+                "get_result_by_job_id": [{"data": row} for row in rows],
+            }
+        },
+        indent=1,
+    ).encode()
+
+
+def chunks(body: bytes, size: int) -> list[bytes]:
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+class TestResultStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rows = [
+            {"number": i, "text": f"row {i} – ünïcode", "nested": {"x": [i, 1.5]}}
+            for i in range(25)
+        ]
+        self.body = result_body(self.rows)
+
+    def test_rows_across_chunk_boundaries(self):
+        for size in [1, 2, 7, 64, len(self.body)]:
+            stream = ResultStream(chunks(self.body, size))
+            self.assertEqual(list(stream), self.rows)
+            self.assertEqual(stream.meta.runtime, 3)
+            self.assertEqual(stream.meta.columns, ("number", "text"))
+
+    def test_meta_available_with_first_row(self):
+        stream = ResultStream(chunks(self.body, 5))
+        self.assertIsNone(stream.meta)
+        first = next(iter(stream))
+        self.assertEqual(first, self.rows[0])
+        self.assertEqual(stream.meta.job_id, "job")
+
+    def test_empty_results(self):
+        self.assertEqual(list(ResultStream(chunks(result_body([]), 3))), [])
+
+    def test_query_errors(self):
+        body = result_body([], query_errors=[{"error": "syntax error"}])
+        with self.assertRaises(RuntimeError):
+            list(ResultStream(chunks(body, 4)))
+
+    def test_request_errors(self):
+        body = b'{"errors": [{"message": "invalid-jwt"}]}'
+        with self.assertRaises(RuntimeError):
+            list(ResultStream(chunks(body, 4)))
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            list(ResultStream([b'{"data": {"get_result_by_job_id": [{"data": 1}']))
+        with self.assertRaises(ValueError):
+            list(ResultStream([b'{"data": {"query_results": []}}']))
+
+    def test_batched(self):
+        batches = list(batched(ResultStream(chunks(self.body, 16)), 10))
+        self.assertEqual([len(b) for b in batches], [10, 10, 5])
+        self.assertEqual([row for batch in batches for row in batch], self.rows)
+
+    def test_closed(self):
+        close = MagicMock()
+        self.assertEqual(list(ResultStream(chunks(self.body, 16), close)), self.rows)
+        close.assert_called_once()
+
+        close = MagicMock()
+        with ResultStream(chunks(self.body, 16), close) as stream:
+            next(iter(stream))
+        close.assert_called_once()
+
+
+class TestStreamResults(unittest.TestCase):
+    def test_stream_results(self):
+        dune = DuneAPI("user", "password")
+        dune.wait_for_job = MagicMock()
+        rows = [{"number": 1}, {"number": 2}]
+        response = Response()
+        response.status_code = 200
+        response.iter_content = MagicMock(
+            return_value=iter(chunks(result_body(rows), 8))
+        )
+        response.close = MagicMock()
+        dune.post_dune_request = MagicMock(return_value=DuneResponse(response))
+
+        self.assertEqual(list(dune.stream_results("job", chunk_size=8)), rows)
+        response.iter_content.assert_called_once_with(8)
+        self.assertTrue(dune.post_dune_request.call_args.kwargs["stream"])
+        response.close.assert_called_once()
+
+    def test_failed_response_closed(self):
+        dune = DuneAPI("user", "password")
+        dune.wait_for_job = MagicMock()
+        response = Response()
+        response.status_code = 500
+        response.close = MagicMock()
+        dune.post_dune_request = MagicMock(return_value=DuneResponse(response))
+        with self.assertRaises(RuntimeError):
+            dune.stream_results("job")
+        response.close.assert_called_once()
+
+    def test_rejected_response_closed(self):
+        dune = DuneAPI("user", "password")
+        dune.token_manager.set("token")
+        dune._renew_token = MagicMock(return_value="fresh-token")
+        rejected = Response()
+        rejected.status_code = 401
+        rejected.close = MagicMock()
+        accepted = Response()
+        accepted.status_code = 200
+        dune._post = MagicMock(side_effect=[rejected, accepted])
+        response = dune.post_dune_request(Post(data={}, key_map={}), stream=True)
+        self.assertIs(response.response, accepted)
+        rejected.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
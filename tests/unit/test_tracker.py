@@ -0,0 +1,105 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from requests import ConnectionError as RequestsConnectionError, Response
+
+from duneapi.api import DuneAPI
+from duneapi.polling import FixedPolling
+from duneapi.tracker import JobTracker
+from duneapi.types import DuneQuery, QueryResults
+
+
+def status_response(statuses: dict) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps({"data": statuses}).encode()
+    return response
+
+
+def query_results(job_id: str) -> QueryResults:
+    results = MagicMock(spec=QueryResults)
+    results.data = [{"job": job_id}]
+    return results
+
+
+class TestQueuePositionsPost(unittest.TestCase):
+    def test_aliases(self):
+        post = DuneQuery.get_queue_positions(["a", "b"])
+        self.assertEqual(post.data["variables"], {"job_0": "a", "job_1": "b"})
+        self.assertEqual(post.key_map, {"job_0": {"id"}, "job_1": {"id"}})
+        self.assertIn("job_1: jobs_by_pk(id: $job_1) { id }", post.data["query"])
+        self.assertIn("($job_0: uuid!, $job_1: uuid!)", post.data["query"])
+
+
+class TestJobTracker(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dune = DuneAPI("user", "password")
+        self.dune.fetch_query_results = MagicMock(side_effect=query_results)
+        self.tracker = JobTracker(self.dune, polling=FixedPolling(0))
+
+    def test_single_request_per_poll(self):
+        self.dune.post_dune_request = MagicMock(
+            side_effect=[
+                status_response({"job_0": {"id": "a"}, "job_1": None}),
+                status_response({"job_0": None}),
+            ]
+        )
+        first, second = self.tracker.track("a"), self.tracker.track("b")
+        self.assertIs(self.tracker.track("a"), first)
+
+        self.assertEqual(self.tracker.poll(), ["b"])
+        self.assertFalse(first.done())
+        self.assertEqual(second.result(), [{"job": "b"}])
+
+        self.tracker.wait()
+        self.assertEqual(first.result(), [{"job": "a"}])
+        self.assertEqual(self.dune.post_dune_request.call_count, 2)
+        self.assertEqual(len(self.tracker), 0)
+
+    def test_batching(self):
+        self.tracker.batch_size = 2
+        self.dune.post_dune_request = MagicMock(
+            side_effect=[
+                status_response({"job_0": None, "job_1": None}),
+                status_response({"job_0": None}),
+            ]
+        )
+        for job_id in ["a", "b", "c"]:
+            self.tracker.track(job_id)
+        self.assertEqual(self.tracker.poll(), ["a", "b", "c"])
+
+    def test_failed_results(self):
+        self.dune.post_dune_request = MagicMock(
+            return_value=status_response({"job_0": None})
+        )
+        self.dune.fetch_query_results = MagicMock(side_effect=RuntimeError("boom"))
+        future = self.tracker.track("a")
+        self.tracker.wait()
+        with self.assertRaises(RuntimeError):
+            future.result()
+
+    def test_failed_request(self):
+        self.dune.post_dune_request = MagicMock(
+            return_value=status_response({"job_0": None})
+        )
+        self.dune.fetch_query_results = MagicMock(
+            side_effect=RequestsConnectionError("reset")
+        )
+        future = self.tracker.track("a")
+        self.tracker.poll()
+        self.assertEqual(len(self.tracker), 0)
+        with self.assertRaises(RequestsConnectionError):
+            future.result(timeout=1)
+
+    def test_timeout(self):
+        self.dune.post_dune_request = MagicMock(
+            return_value=status_response({"job_0": {"id": "a"}})
+        )
+        self.tracker.track("a")
+        with self.assertRaises(TimeoutError):
+            self.tracker.wait(timeout=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
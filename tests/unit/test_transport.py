@@ -0,0 +1,85 @@
+import json
+import unittest
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from duneapi.api import DuneAPI
+from duneapi.transport import TransportConfig
+from duneapi.types import DuneQuery
+
+
+class FakeAdapter(BaseAdapter):
+    """Answers every request locally, recording the requests and their timeouts"""
+
+    def __init__(self, content: dict):
+        super().__init__()
+        self.content = content
+        self.requests: list[tuple[PreparedRequest, object]] = []
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        self.requests.append((request, timeout))
+        response = Response()
+        response.status_code = 200
+        response._content = json.dumps(self.content).encode()
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class TestTransportConfig(unittest.TestCase):
+    def test_for_workers(self):
+        self.assertEqual(TransportConfig.for_workers(4).pool_maxsize, 10)
+        config = TransportConfig.for_workers(32)
+        self.assertEqual((config.pool_connections, config.pool_maxsize), (32, 32))
+
+    def test_adapter(self):
+        adapter = TransportConfig(pool_maxsize=16, max_retries=2).build_adapter()
+        self.assertIsInstance(adapter, HTTPAdapter)
+        self.assertEqual(adapter._pool_maxsize, 16)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        self.assertEqual(adapter.max_retries.read, 0)
+        # POSTs (which may start executions) are only retried if never sent
+        self.assertNotIn("POST", adapter.max_retries.allowed_methods)
+        self.assertTrue(adapter.max_retries.is_retry("GET", 503))
+        self.assertFalse(adapter.max_retries.is_retry("POST", 503))
+
+    def test_session_headers(self):
+        session = TransportConfig().build_session()
+        self.assertIn("gzip", session.headers["accept-encoding"])
+        self.assertEqual(session.headers["connection"], "keep-alive")
+        session = TransportConfig(compression=False).build_session()
+        self.assertEqual(session.headers["accept-encoding"], "identity")
+
+    def test_timeouts_by_operation(self):
+        config = TransportConfig(
+            connect_timeout=1, request_timeout=2, download_timeout=3
+        )
+        self.assertEqual(config.timeout(DuneQuery.get_queue_position("job")), (1, 2))
+        self.assertEqual(config.timeout(DuneQuery.find_result_by_job("job")), (1, 3))
+        self.assertEqual(
+            config.timeout(DuneQuery.find_result_page("job", 10, 0)), (1, 3)
+        )
+
+    def test_injected_adapter(self):
+        adapter = FakeAdapter({"data": {"jobs_by_pk": None}})
+        dune = DuneAPI("user", "password", transport=TransportConfig(adapter=adapter))
+        dune.token_manager.set("token")
+
+        dune.wait_for_job("job")
+        request, timeout = adapter.requests[-1]
+        self.assertEqual(timeout, dune.transport.poll_timeout)
+        self.assertEqual(request.headers["content-type"], "application/json")
+        self.assertIn("gzip", request.headers["accept-encoding"])
+        self.assertEqual(request.headers["authorization"], "Bearer token")
+        # The token is sent per request, never stored on the shared session.
+        self.assertNotIn("authorization", dune.session.headers)
+        self.assertEqual(json.loads(request.body)["variables"], {"job_id": "job"})
+
+
+if __name__ == "__main__":
+    unittest.main()
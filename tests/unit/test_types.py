@@ -1,8 +1,18 @@
 import datetime
+import copy
 import json
+import pickle
 import unittest
 
-from duneapi.types import Network, MetaData, QueryResults, QueryParameter, Address
+from duneapi.types import (
+    Address,
+    ColumnarResults,
+    DuneQuery,
+    MetaData,
+    Network,
+    QueryParameter,
+    QueryResults,
+)
 
 
 class TestAddress(unittest.TestCase):
@@ -45,6 +55,44 @@ class TestAddress(unittest.TestCase):
         self.assertEqual(a_lower, a_upper)
         self.assertLess(a_upper, b_lower)
         self.assertLess(b_lower, c_upper)
+        self.assertEqual(len({a_lower, a_upper, b_lower}), 2)
+
+    def test_immutable(self):
+        address = Address(self.lower_case_address)
+        with self.assertRaises(AttributeError):
+            address.address = self.check_sum_address
+        self.assertFalse(hasattr(address, "__dict__"))
+        self.assertEqual(copy.copy(address), address)
+        self.assertEqual(pickle.loads(pickle.dumps(address)), address)
+
+    def test_many(self):
+        addresses = Address.many(
+            [
+                self.lower_case_address,
+                self.dune_format,
+                self.lower_case_address.upper().replace("0X", "0x"),
+                self.dune_format.replace("\\x", "0x"),
+            ]
+        )
+        self.assertEqual(
+            [a.address for a in addresses],
+            [
+                "0xdE1c59Bc25D806aD9DdCbe246c4B5e5505645718",
+                "0x5d4020b9261F01B6f8a45db929704b0Ad6F5e9E6",
+                "0xdE1c59Bc25D806aD9DdCbe246c4B5e5505645718",
+                "0x5d4020b9261F01B6f8a45db929704b0Ad6F5e9E6",
+            ],
+        )
+        # Equal addresses share one instance, also across calls.
+        self.assertIs(addresses[0], addresses[2])
+        self.assertIs(addresses[1], addresses[3])
+        self.assertIs(Address.many([self.dune_format])[0], addresses[1])
+        self.assertEqual(addresses[0], Address(self.lower_case_address))
+        with self.assertRaises(ValueError) as err:
+            Address.many([self.lower_case_address, self.invalid_address])
+        self.assertEqual(
+            str(err.exception), f"Invalid Ethereum Address {self.invalid_address}"
+        )
 
 
 class TestNetworkEnum(unittest.TestCase):
@@ -102,7 +150,29 @@ class TestQueryResults(unittest.TestCase):
 
     def test_metadata_constructor(self):
         result = MetaData(json.dumps(self.metadata_content))
-        self.assertEqual(result.__dict__, self.metadata_content)
+        self.assertEqual(
+            result.to_dict(),
+            {
+                "id": "3158cc2c-5ed1-4779-b523-eeb9c3b34b21",
+                "job_id": "093e440d-66ce-4c00-81ec-2406f0403bc0",
+                "error": None,
+                "runtime": 0,
+                "generated_at": datetime.datetime(
+                    2022, 3, 19, 7, 11, 37, 344998, tzinfo=datetime.timezone.utc
+                ),
+                "columns": ["number", "size", "time", "block_hash", "tx_fees"],
+            },
+        )
+        self.assertEqual(MetaData.from_dict(self.metadata_content), result)
+        self.assertEqual(MetaData.from_dict(result.to_dict()), result)
+
+    def test_metadata_immutable(self):
+        result = MetaData.from_dict(self.metadata_content)
+        self.assertFalse(hasattr(result, "__dict__"))
+        with self.assertRaises(AttributeError):
+            result.runtime = 1
+        self.assertEqual(pickle.loads(pickle.dumps(result)), result)
+        self.assertEqual(len({result, MetaData.from_dict(self.metadata_content)}), 1)
 
     def test_constructor_success(self):
         results = QueryResults(self.valid_empty_results)
@@ -126,6 +196,48 @@ class TestQueryResults(unittest.TestCase):
         )
 
 
+class TestColumnarResults(unittest.TestCase):
+    def setUp(self) -> None:
+        self.response_data = {
+            "query_results": [
+                {
+                    "id": "3158cc2c-5ed1-4779-b523-eeb9c3b34b21",
+                    "job_id": "093e440d-66ce-4c00-81ec-2406f0403bc0",
+                    "runtime": 0,
+                    "generated_at": "2022-03-19T07:11:37.344998+00:00",
+                    "columns": ["number", "hash"],
+                }
+            ],
+            "get_result_by_job_id": [
+                {"data": {"number": str(i), "hash": f"0x{i}"}} for i in range(5)
+            ],
+            "query_errors": [],
+        }
+
+    def test_from_response(self):
+        results = ColumnarResults.from_response(self.response_data)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results.columns, ["number", "hash"])
+        self.assertEqual(results["number"], ["0", "1", "2", "3", "4"])
+        self.assertEqual(results.column("hash")[1], "0x1")
+        self.assertEqual(results[2], ("2", "0x2"))
+        self.assertEqual(list(results)[-1], ("4", "0x4"))
+        self.assertEqual(results.to_records(), QueryResults(self.response_data).data)
+
+    def test_slice(self):
+        results = ColumnarResults.from_response(self.response_data)[1:3]
+        self.assertIsInstance(results, ColumnarResults)
+        self.assertEqual(list(results), [("1", "0x1"), ("2", "0x2")])
+        self.assertIsNotNone(results.meta)
+
+    def test_empty(self):
+        self.response_data["get_result_by_job_id"] = []
+        results = ColumnarResults.from_response(self.response_data)
+        self.assertEqual(len(results), 0)
+        self.assertEqual(list(results), [])
+        self.assertEqual(len(ColumnarResults([], [])), 0)
+
+
 class TestQueryParameter(unittest.TestCase):
     def test_constructors_and_to_dict(self):
         number_type = QueryParameter.number_type("Number", 1)
@@ -143,6 +255,59 @@ class TestQueryParameter(unittest.TestCase):
             {"key": "Date", "type": "datetime", "value": "2022-03-10 00:00:00"},
         )
 
+    def test_immutable_value_type(self):
+        enum_type = QueryParameter.enum_type("Enum", "a", ["a", "b"])
+        with self.assertRaises(AttributeError):
+            enum_type.value = "b"
+        changed = enum_type.with_value("b")
+        self.assertEqual(enum_type.value, "a")
+        self.assertEqual(changed.to_dict()["value"], "b")
+        self.assertEqual(changed.to_dict()["enumOptions"], ["a", "b"])
+        self.assertEqual(QueryParameter.from_dict(changed.to_dict()), changed)
+        self.assertEqual(len({enum_type, changed, copy.deepcopy(enum_type)}), 2)
+        self.assertEqual(pickle.loads(pickle.dumps(changed)), changed)
+
+
+class TestDuneQuery(unittest.TestCase):
+    def test_fingerprint(self):
+        def query(value: int) -> DuneQuery:
+            return DuneQuery(
+                query_id=1,
+                raw_sql="select 1",
+                parameters=[QueryParameter.number_type("Number", value)],
+            )
+
+        self.assertEqual(query(1).fingerprint(), query(1).fingerprint())
+        self.assertNotEqual(query(1).fingerprint(), query(2).fingerprint())
+        polygon_query = query(1)
+        polygon_query.network = Network.POLYGON
+        self.assertNotEqual(query(1).fingerprint(), polygon_query.fingerprint())
+
+    def test_minimal_upsert_post(self):
+        query = DuneQuery(query_id=1, raw_sql="select 1")
+        full, minimal = query.upsert_query_post(), query.upsert_query_post(True)
+        self.assertEqual(minimal.key_map, {"insert_queries_one": {"id", "updated_at"}})
+        self.assertEqual(
+            minimal.data["variables"],
+            {
+                "object": full.data["variables"]["object"],
+                "on_conflict": full.data["variables"]["on_conflict"],
+            },
+        )
+        self.assertNotIn("fragment", minimal.data["query"])
+
+    def test_result_pages(self):
+        self.assertEqual(
+            DuneQuery.find_result_by_job("job").data["variables"], {"job_id": "job"}
+        )
+        first_page = DuneQuery.find_result_by_job("job", limit=10)
+        self.assertEqual(first_page.data["variables"], {"job_id": "job", "limit": 10})
+        page = DuneQuery.find_result_page("job", limit=10, offset=20)
+        self.assertEqual(
+            page.data["variables"], {"job_id": "job", "limit": 10, "offset": 20}
+        )
+        self.assertEqual(page.key_map, {"get_result_by_job_id": {"data"}})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,16 @@
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
-from duneapi.util import datetime_parser, open_query, duplicates, DUNE_DATE_FORMAT
+from duneapi.util import (
+    datetime_parser,
+    datetime_parser_for,
+    parse_datetime,
+    open_query,
+    duplicates,
+    from_isoformat,
+    seconds_since,
+    DUNE_DATE_FORMAT,
+)
 
 
 class TestUtilities(unittest.TestCase):
@@ -21,6 +30,42 @@ class TestUtilities(unittest.TestCase):
             },
         )
 
+    def test_parse_datetime(self):
+        utc = timezone.utc
+        self.assertEqual(
+            parse_datetime("2022-03-19T07:11:37.344998+00:00"),
+            datetime(2022, 3, 19, 7, 11, 37, 344998, tzinfo=utc),
+        )
+        # Trailing zeros of the fraction trimmed (by postgres)
+        self.assertEqual(
+            parse_datetime("2022-03-19T07:11:37.34499+00:00"),
+            datetime(2022, 3, 19, 7, 11, 37, 344990, tzinfo=utc),
+        )
+        self.assertEqual(
+            parse_datetime("2022-03-10T23:50:16Z"),
+            datetime(2022, 3, 10, 23, 50, 16, tzinfo=utc),
+        )
+        self.assertEqual(
+            parse_datetime("2022-03-10 23:50:16"), datetime(2022, 3, 10, 23, 50, 16)
+        )
+        for not_a_date in [
+            "",
+            "hello",
+            "2022-03-10",
+            "0x255309e019abaf74bf2d58d4020547c89f875842",
+            "2022-13-10 23:50:16",
+            "2022-03-10 23:50:16 and more text beyond",
+        ]:
+            self.assertIsNone(parse_datetime(not_a_date), not_a_date)
+
+    def test_date_parser_for_columns(self):
+        parser = datetime_parser_for(["time"])
+        self.assertEqual(
+            parser({"time": "2022-03-10 23:50:16", "other": "2022-03-10 23:50:16"}),
+            {"time": datetime(2022, 3, 10, 23, 50, 16), "other": "2022-03-10 23:50:16"},
+        )
+        self.assertEqual(parser({"time": None}), {"time": None})
+
     def test_open_query(self):
         query = "select 10 - '{{IntParameter}}' as value"
         self.assertEqual(query, open_query("./tests/queries/test_query.sql"))
@@ -33,6 +78,29 @@ class TestUtilities(unittest.TestCase):
         with self.assertRaises(TypeError) as err:
             duplicates([{"x": 1, "y": 2}])
 
+    def test_from_isoformat(self):
+        expected = datetime(2022, 3, 19, 7, 11, 37, 344990, tzinfo=timezone.utc)
+        # Postgres trims trailing zeros of fractional seconds
+        self.assertEqual(from_isoformat("2022-03-19T07:11:37.34499+00:00"), expected)
+        self.assertEqual(from_isoformat("2022-03-19T07:11:37.34499Z"), expected)
+        self.assertEqual(
+            from_isoformat("2022-03-19T07:11:37.3+00:00"),
+            expected.replace(microsecond=300000),
+        )
+        self.assertEqual(
+            from_isoformat("2022-03-19 07:11:37.1234567"),
+            datetime(2022, 3, 19, 7, 11, 37, 123456),
+        )
+        with self.assertRaises(ValueError):
+            from_isoformat("2022-13-19T07:11:37.34499")
+
+    def test_seconds_since(self):
+        hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+        self.assertAlmostEqual(seconds_since(hour_ago), 3600, delta=5)
+        self.assertAlmostEqual(seconds_since(hour_ago.isoformat()), 3600, delta=5)
+        naive = hour_ago.replace(tzinfo=None)
+        self.assertAlmostEqual(seconds_since(naive), 3600, delta=5)
+
 
 if __name__ == "__main__":
     unittest.main()